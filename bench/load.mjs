@@ -0,0 +1,260 @@
+// Load generator for Cognova. Drives chat, knowledge tree and usage stats
+// against a running server and reports latency, time-to-first-token,
+// throughput and DB queries per request.
+//
+// Start the server with NUXT_METRICS_ENABLED=true and the mock LLM
+// (bench/mock-llm.mjs) running; chat turns go to the mock provider.
+//
+//   BENCH_URL=http://localhost:3000
+//   BENCH_EMAIL / BENCH_PASSWORD   defaults to the seeded admin user
+//   BENCH_MOCK_URL=http://localhost:4010/v1
+//   BENCH_CONCURRENCY=8            concurrent clients per scenario
+//   BENCH_REQUESTS=100             requests per scenario
+//   BENCH_SCENARIOS=chat,tree,stats
+//   BENCH_OUTPUT=report.json       also write the report as JSON
+
+import { randomUUID } from 'node:crypto'
+import { writeFile } from 'node:fs/promises'
+
+const BASE_URL = process.env.BENCH_URL || 'http://localhost:3000'
+const EMAIL = process.env.BENCH_EMAIL || process.env.NUXT_ADMIN_EMAIL || 'admin@example.com'
+const PASSWORD = process.env.BENCH_PASSWORD || process.env.NUXT_ADMIN_PASSWORD || 'changeme123'
+const MOCK_URL = process.env.BENCH_MOCK_URL || 'http://localhost:4010/v1'
+const CONCURRENCY = Number(process.env.BENCH_CONCURRENCY || 8)
+const REQUESTS = Number(process.env.BENCH_REQUESTS || 100)
+const SCENARIOS = (process.env.BENCH_SCENARIOS || 'chat,tree,stats').split(',').map(s => s.trim()).filter(Boolean)
+const OUTPUT = process.env.BENCH_OUTPUT
+
+const PROVIDER_NAME = 'Benchmark Mock'
+const MOCK_MODEL_ID = 'mock-model'
+
+let cookie = ''
+
+async function api(path, options = {}) {
+  const res = await fetch(`${BASE_URL}${path}`, {
+    ...options,
+    headers: {
+      'Content-Type': 'application/json',
+      'Origin': BASE_URL,
+      'Cookie': cookie,
+      ...options.headers
+    },
+    body: options.body === undefined ? undefined : JSON.stringify(options.body)
+  })
+  if (!res.ok)
+    throw new Error(`${options.method || 'GET'} ${path} failed: ${res.status} ${await res.text()}`)
+  return res.json()
+}
+
+async function signIn() {
+  const res = await fetch(`${BASE_URL}/api/auth/sign-in/email`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Origin': BASE_URL },
+    body: JSON.stringify({ email: EMAIL, password: PASSWORD })
+  })
+  if (!res.ok)
+    throw new Error(`Sign-in failed: ${res.status} ${await res.text()}`)
+  cookie = res.headers.getSetCookie().map(c => c.split(';')[0]).join('; ')
+}
+
+async function getMetrics() {
+  const res = await fetch(`${BASE_URL}/api/metrics`, { headers: { Cookie: cookie } })
+  if (!res.ok)
+    return null
+  return (await res.json()).data
+}
+
+/**
+ * Point the default model at the mock provider. Returns a function that
+ * restores the previous default and removes the benchmark conversations.
+ */
+async function setupChat(conversationCount) {
+  const { data: providers } = await api('/api/providers')
+  let provider = providers.find(p => p.name === PROVIDER_NAME)
+  if (!provider) {
+    provider = (await api('/api/providers', {
+      method: 'POST',
+      body: { name: PROVIDER_NAME, typeId: 'openai-compatible', configJson: { baseURL: MOCK_URL, name: 'mock' } }
+    })).data
+  }
+
+  const { data: models } = await api(`/api/providers/${provider.id}/models`)
+  let model = models.find(m => m.modelId === MOCK_MODEL_ID)
+  if (!model) {
+    model = (await api(`/api/providers/${provider.id}/models`, {
+      method: 'POST',
+      body: { modelId: MOCK_MODEL_ID, displayName: 'Mock Model', tags: [] }
+    })).data
+  }
+
+  const { data: settings } = await api('/api/settings')
+  const previousDefault = settings.defaultModelId ?? null
+  await api('/api/settings', { method: 'PUT', body: { defaultModelId: model.id } })
+
+  const conversations = []
+  for (let i = 0; i < conversationCount; i++) {
+    const { data } = await api('/api/conversations', { method: 'POST', body: { title: `Benchmark ${i + 1}` } })
+    conversations.push(data.id)
+  }
+
+  const teardown = async () => {
+    await api('/api/settings', { method: 'PUT', body: { defaultModelId: previousDefault } })
+    await Promise.all(conversations.map(id => api(`/api/conversations/${id}`, { method: 'DELETE' }).catch(() => {})))
+  }
+
+  return { conversations, teardown }
+}
+
+async function chatTurn(conversationId, n) {
+  const start = performance.now()
+  const res = await fetch(`${BASE_URL}/api/conversations/${conversationId}/chat`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Origin': BASE_URL, 'Cookie': cookie },
+    body: JSON.stringify({
+      message: { id: randomUUID(), role: 'user', parts: [{ type: 'text', text: `Benchmark question ${n}: summarize what you know.` }] }
+    })
+  })
+  if (!res.ok || !res.body)
+    throw new Error(`chat failed: ${res.status}`)
+
+  let ttftMs = null
+  const decoder = new TextDecoder()
+  for await (const chunk of res.body) {
+    if (ttftMs === null && decoder.decode(chunk, { stream: true }).includes('"text-delta"'))
+      ttftMs = performance.now() - start
+  }
+  return { latencyMs: performance.now() - start, ttftMs, serverTiming: res.headers.get('server-timing') }
+}
+
+async function simpleGet(path) {
+  const start = performance.now()
+  const res = await fetch(`${BASE_URL}${path}`, { headers: { Cookie: cookie } })
+  await res.arrayBuffer()
+  if (!res.ok)
+    throw new Error(`${path} failed: ${res.status}`)
+  return { latencyMs: performance.now() - start, ttftMs: null, serverTiming: res.headers.get('server-timing') }
+}
+
+function percentile(sorted, p) {
+  if (!sorted.length)
+    return null
+  return sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)]
+}
+
+function summarize(values) {
+  const sorted = values.filter(v => v !== null).sort((a, b) => a - b)
+  return { p50: percentile(sorted, 0.5), p95: percentile(sorted, 0.95), p99: percentile(sorted, 0.99) }
+}
+
+async function runScenario(name, request) {
+  const before = await getMetrics()
+  const samples = []
+  let errors = 0
+  let next = 0
+  let lastError = null
+
+  const start = performance.now()
+  await Promise.all(Array.from({ length: CONCURRENCY }, async (_, worker) => {
+    while (next < REQUESTS) {
+      const n = next++
+      try {
+        samples.push(await request(worker, n))
+      } catch (error) {
+        errors++
+        lastError = error
+      }
+    }
+  }))
+  const wallMs = performance.now() - start
+  const after = await getMetrics()
+
+  if (lastError)
+    console.warn(`[bench] ${name}: ${errors} failed, last error: ${lastError.message}`)
+
+  const requests = after && before ? after.requests - before.requests : null
+  return {
+    scenario: name,
+    requests: samples.length,
+    errors,
+    rps: samples.length / (wallMs / 1000),
+    latencyMs: summarize(samples.map(s => s.latencyMs)),
+    ttftMs: summarize(samples.map(s => s.ttftMs)),
+    // Includes background writes (usage flush, summaries) that land during the run
+    dbQueriesPerRequest: requests ? (after.dbQueries - before.dbQueries) / requests : null,
+    sampleServerTiming: samples.find(s => s.serverTiming)?.serverTiming ?? null
+  }
+}
+
+const fmt = v => (v === null || v === undefined ? '-' : v.toFixed(1))
+
+function printReport(results, metrics) {
+  console.log('\nScenario   Reqs  Err     RPS   p50 ms   p95 ms   p99 ms  TTFT p50  TTFT p95  TTFT p99  DB q/req')
+  for (const r of results) {
+    console.log([
+      r.scenario.padEnd(8),
+      String(r.requests).padStart(6),
+      String(r.errors).padStart(4),
+      fmt(r.rps).padStart(7),
+      fmt(r.latencyMs.p50).padStart(8),
+      fmt(r.latencyMs.p95).padStart(8),
+      fmt(r.latencyMs.p99).padStart(8),
+      fmt(r.ttftMs.p50).padStart(9),
+      fmt(r.ttftMs.p95).padStart(9),
+      fmt(r.ttftMs.p99).padStart(9),
+      fmt(r.dbQueriesPerRequest).padStart(9)
+    ].join(' '))
+  }
+
+  if (!metrics)
+    return
+  console.log('\nServer stage     Count   p50 ms   p95 ms   p99 ms   max ms')
+  for (const [stage, h] of Object.entries(metrics.stages)) {
+    console.log([
+      stage.padEnd(14),
+      String(h.count).padStart(7),
+      fmt(h.p50Ms).padStart(8),
+      fmt(h.p95Ms).padStart(8),
+      fmt(h.p99Ms).padStart(8),
+      fmt(h.maxMs).padStart(8)
+    ].join(' '))
+  }
+}
+
+async function main() {
+  await signIn()
+  if (!await getMetrics())
+    console.warn('[bench] /api/metrics unavailable — start the server with NUXT_METRICS_ENABLED=true for DB query counts and stage timings')
+
+  console.log(`[bench] ${BASE_URL}: ${SCENARIOS.join(', ')} × ${REQUESTS} requests at concurrency ${CONCURRENCY}`)
+  const results = []
+
+  for (const scenario of SCENARIOS) {
+    if (scenario === 'chat') {
+      const { conversations, teardown } = await setupChat(CONCURRENCY)
+      try {
+        results.push(await runScenario('chat', (worker, n) => chatTurn(conversations[worker], n)))
+      } finally {
+        await teardown()
+      }
+    } else if (scenario === 'tree') {
+      results.push(await runScenario('tree', () => simpleGet('/api/knowledge/tree')))
+    } else if (scenario === 'stats') {
+      results.push(await runScenario('stats', () => simpleGet('/api/usage/stats?period=30d')))
+    } else {
+      console.warn(`[bench] Unknown scenario "${scenario}"`)
+    }
+  }
+
+  const metrics = await getMetrics()
+  printReport(results, metrics)
+
+  if (OUTPUT) {
+    await writeFile(OUTPUT, JSON.stringify({ config: { BASE_URL, CONCURRENCY, REQUESTS }, results, metrics }, null, 2))
+    console.log(`\n[bench] Report written to ${OUTPUT}`)
+  }
+}
+
+main().catch((error) => {
+  console.error('[bench] Failed:', error)
+  process.exit(1)
+})
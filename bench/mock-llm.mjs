@@ -0,0 +1,157 @@
+// Mock OpenAI-compatible LLM server for benchmarking.
+// Add it in Settings > Providers as "OpenAI Compatible" with base URL
+// http://localhost:4010/v1 (bench/load.mjs does this automatically).
+//
+//   MOCK_LLM_PORT=4010           port to listen on
+//   MOCK_LLM_TTFT_MS=300         delay before the first token
+//   MOCK_LLM_TOKEN_MS=15         delay between streamed tokens
+//   MOCK_LLM_OUTPUT_TOKENS=64    tokens per response
+//
+// Usage reports prompt_tokens_details.cached_tokens: a system prompt seen
+// before counts as cached, like a provider-side prefix cache.
+
+import { createServer } from 'node:http'
+import { createHash, randomUUID } from 'node:crypto'
+
+const PORT = Number(process.env.MOCK_LLM_PORT || 4010)
+const TTFT_MS = Number(process.env.MOCK_LLM_TTFT_MS || 300)
+const TOKEN_MS = Number(process.env.MOCK_LLM_TOKEN_MS || 15)
+const OUTPUT_TOKENS = Number(process.env.MOCK_LLM_OUTPUT_TOKENS || 64)
+const MODEL_ID = 'mock-model'
+
+const WORDS = ['the', 'agent', 'reads', 'knowledge', 'and', 'answers', 'with', 'care', 'about', 'each', 'question', 'it', 'gets']
+
+const seenPrefixes = new Set()
+let requests = 0
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms))
+
+function estimateTokens(text) {
+  return Math.ceil(text.length / 4)
+}
+
+function messageText(message) {
+  if (typeof message.content === 'string')
+    return message.content
+  if (Array.isArray(message.content))
+    return message.content.map(part => part.text || '').join('')
+  return ''
+}
+
+function usageFor(messages) {
+  const promptTokens = messages.reduce((sum, m) => sum + estimateTokens(messageText(m)), 0)
+  const system = messages.filter(m => m.role === 'system').map(messageText).join('\n')
+  const key = createHash('sha256').update(system).digest('hex')
+  const cachedTokens = system && seenPrefixes.has(key) ? estimateTokens(system) : 0
+  seenPrefixes.add(key)
+
+  return {
+    prompt_tokens: promptTokens,
+    completion_tokens: OUTPUT_TOKENS,
+    total_tokens: promptTokens + OUTPUT_TOKENS,
+    prompt_tokens_details: { cached_tokens: cachedTokens }
+  }
+}
+
+function token(i) {
+  return (i === 0 ? '' : ' ') + WORDS[i % WORDS.length]
+}
+
+async function readJson(req) {
+  const chunks = []
+  for await (const chunk of req)
+    chunks.push(chunk)
+  return JSON.parse(Buffer.concat(chunks).toString() || '{}')
+}
+
+async function streamCompletion(req, res, body) {
+  let closed = false
+  req.on('close', () => {
+    closed = true
+  })
+
+  const id = `chatcmpl-${randomUUID()}`
+  const created = Math.floor(Date.now() / 1000)
+  const send = (data) => {
+    if (!closed)
+      res.write(`data: ${JSON.stringify(data)}\n\n`)
+  }
+  const chunk = (delta, finishReason = null) => ({
+    id,
+    object: 'chat.completion.chunk',
+    created,
+    model: body.model || MODEL_ID,
+    choices: [{ index: 0, delta, finish_reason: finishReason }]
+  })
+
+  res.writeHead(200, {
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive'
+  })
+
+  await sleep(TTFT_MS)
+  send(chunk({ role: 'assistant', content: '' }))
+  for (let i = 0; i < OUTPUT_TOKENS && !closed; i++) {
+    send(chunk({ content: token(i) }))
+    if (TOKEN_MS)
+      await sleep(TOKEN_MS)
+  }
+  send(chunk({}, 'stop'))
+  send({ id, object: 'chat.completion.chunk', created, model: body.model || MODEL_ID, choices: [], usage: usageFor(body.messages || []) })
+  if (!closed)
+    res.end('data: [DONE]\n\n')
+}
+
+async function completion(res, body) {
+  await sleep(TTFT_MS + TOKEN_MS * OUTPUT_TOKENS)
+  const text = Array.from({ length: OUTPUT_TOKENS }, (_, i) => token(i)).join('')
+  res.writeHead(200, { 'Content-Type': 'application/json' })
+  res.end(JSON.stringify({
+    id: `chatcmpl-${randomUUID()}`,
+    object: 'chat.completion',
+    created: Math.floor(Date.now() / 1000),
+    model: body.model || MODEL_ID,
+    choices: [{ index: 0, message: { role: 'assistant', content: text }, finish_reason: 'stop' }],
+    usage: usageFor(body.messages || [])
+  }))
+}
+
+const server = createServer(async (req, res) => {
+  try {
+    const path = new URL(req.url, 'http://localhost').pathname
+
+    if (req.method === 'GET' && path === '/v1/models') {
+      res.writeHead(200, { 'Content-Type': 'application/json' })
+      res.end(JSON.stringify({ object: 'list', data: [{ id: MODEL_ID, object: 'model', owned_by: 'mock' }] }))
+      return
+    }
+
+    if (req.method === 'POST' && path === '/v1/chat/completions') {
+      requests++
+      const body = await readJson(req)
+      if (body.stream)
+        await streamCompletion(req, res, body)
+      else
+        await completion(res, body)
+      return
+    }
+
+    res.writeHead(404, { 'Content-Type': 'application/json' })
+    res.end(JSON.stringify({ error: { message: `No route for ${req.method} ${path}` } }))
+  } catch (error) {
+    console.error('[mock-llm] Request failed:', error)
+    if (!res.headersSent)
+      res.writeHead(500, { 'Content-Type': 'application/json' })
+    res.end(JSON.stringify({ error: { message: String(error) } }))
+  }
+})
+
+server.listen(PORT, () => {
+  console.log(`[mock-llm] Listening on http://localhost:${PORT}/v1 (ttft ${TTFT_MS}ms, ${TOKEN_MS}ms/token, ${OUTPUT_TOKENS} tokens)`)
+})
+
+process.on('SIGINT', () => {
+  console.log(`[mock-llm] Served ${requests} completions`)
+  process.exit(0)
+})
@@ -16,10 +16,29 @@ export default defineNuxtConfig({
     betterAuthSecret: '',
     betterAuthUrl: 'http://localhost:3000',
     knowledgePath: '~/knowledge',
+    // 'full' pastes all knowledge into the system prompt; 'retrieval' injects top-k chunks per turn
+    knowledgeMode: 'full',
+    knowledgeTopK: 5,
+    // Prompt history sent per chat turn; older turns are folded into a rolling summary
+    historyTokenBudget: 8000,
+    historyMaxMessages: 40,
     encryptionKey: '',
     adminEmail: '',
     adminPassword: '',
-    adminName: 'Admin'
+    adminName: 'Admin',
+    // In-process session cache in front of better-auth getSession (0 disables)
+    sessionCacheMax: 1000,
+    sessionCacheTtlMs: 30_000,
+    // Cron agent executor: worker pool size, poll interval, and per-provider
+    // model-call rate limit so scheduled runs leave headroom for chat
+    cronEnabled: true,
+    cronConcurrency: 2,
+    cronPollIntervalMs: 15_000,
+    cronProviderRpm: 20,
+    cronProviderBurst: 2,
+    cronRunTimeoutMs: 600_000,
+    // Server-Timing headers and per-stage histograms at /api/metrics
+    metricsEnabled: false
   },
 
   routeRules: {
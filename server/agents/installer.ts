@@ -4,6 +4,7 @@ import { load as loadYaml } from 'js-yaml'
 import { eq } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
 import { resolveKnowledgeBase } from '~~/server/utils/knowledge-path'
+import { invalidateAgentModule } from '~~/server/agents/loader'
 import type { AgentManifest } from '~~/shared/types/agent'
 
 interface ManifestFile {
@@ -153,6 +154,9 @@ export async function reimportAgent(agentId: string): Promise<void> {
       updatedAt: new Date()
     })
     .where(eq(schema.installedAgents.id, agentId))
+
+  // The source may have changed: re-import it on next use
+  invalidateAgentModule(agentId)
 }
 
 /**
@@ -5,55 +5,119 @@ import { tool } from 'ai'
 import { z } from 'zod'
 import { getDb, schema } from '~~/server/db'
 import { getKnowledgeLoader } from '~~/server/knowledge'
-import type { CognovaAgent, CreateAgentFn } from '~~/shared/types/agent'
-import { resolveModelForAgent } from './resolve-model'
-
-const CACHE_TTL_MS = 5 * 60 * 1000
+import { singleFlight } from '~~/server/utils/concurrency'
+import { timeStage } from '~~/server/utils/metrics'
+import type { AgentKnowledge, CognovaAgent, CreateAgentFn } from '~~/shared/types/agent'
+import { resolveModelForAgent, invalidateResolvedModels } from './resolve-model'
+import { createKnowledgeSearchTool } from './tools/knowledge'
+
+// The agent as returned by createAgent(), plus the framework-owned knowledge
+// so the chat endpoint can retrieve per-turn context without reloading it
+export interface LoadedAgent extends CognovaAgent {
+  knowledge: AgentKnowledge
+  knowledgeMode: 'full' | 'retrieval'
+}
 
 interface CacheEntry {
-  agent: CognovaAgent
-  loadedAt: number
+  agent: LoadedAgent
+  // The knowledge snapshot the agent was built from; a new one means rebuild
+  knowledge: AgentKnowledge
 }
 
-const cache = new Map<string, CacheEntry>()
+type AgentRecord = typeof schema.installedAgents.$inferSelect
+
+// No TTLs: the agent, config and reimport handlers invalidate explicitly.
+// Compiled agent modules keyed by agentId, shared across users — importing
+// an external agent transpiles its TypeScript, so this is done once per source.
+const modules = new Map<string, Promise<CreateAgentFn>>()
+// createAgent() results keyed by agentId:userId
+const agents = new Map<string, Promise<CacheEntry>>()
+let defaultAgentId: Promise<string> | null = null
 
 function cacheKey(agentId: string, userId: string): string {
   return `${agentId}:${userId}`
 }
 
+async function findDefaultAgentId(): Promise<string> {
+  const [defaultAgent] = await getDb().select({ id: schema.installedAgents.id })
+    .from(schema.installedAgents)
+    .where(and(
+      eq(schema.installedAgents.builtIn, true),
+      eq(schema.installedAgents.enabled, true)
+    ))
+    .limit(1)
+
+  if (!defaultAgent)
+    throw createError({ statusCode: 500, message: 'No default agent configured' })
+
+  return defaultAgent.id
+}
+
+function getDefaultAgentId(): Promise<string> {
+  if (!defaultAgentId) {
+    const pending = findDefaultAgentId()
+    defaultAgentId = pending
+    pending.catch(() => {
+      if (defaultAgentId === pending)
+        defaultAgentId = null
+    })
+  }
+  return defaultAgentId
+}
+
+function loadAgentModule(agentRecord: AgentRecord): Promise<CreateAgentFn> {
+  return singleFlight(modules, agentRecord.id, async () => {
+    if (agentRecord.builtIn) {
+      const { createAgent } = await import('~~/server/agents/built-in/default/index')
+      return createAgent
+    }
+
+    if (!agentRecord.localPath)
+      throw createError({ statusCode: 500, message: 'Agent has no source path configured' })
+
+    // Our module cache decides when to re-evaluate, so bypass jiti's require
+    // cache — otherwise a reimport would keep serving the old module
+    const jiti = createJiti(import.meta.url, { moduleCache: false })
+    const mod = await jiti.import(join(agentRecord.localPath, 'index')) as { createAgent?: CreateAgentFn }
+    if (!mod.createAgent)
+      throw createError({ statusCode: 500, message: 'Agent module missing createAgent export' })
+    return mod.createAgent
+  })
+}
+
 export async function loadAgent(
   agentId: string | null,
   userId: string
-): Promise<CognovaAgent> {
-  const db = getDb()
-
+): Promise<LoadedAgent> {
   // If no agentId, find the default built-in agent
-  let resolvedAgentId = agentId
-  if (!resolvedAgentId) {
-    const [defaultAgent] = await db.select()
-      .from(schema.installedAgents)
-      .where(and(
-        eq(schema.installedAgents.builtIn, true),
-        eq(schema.installedAgents.enabled, true)
-      ))
-      .limit(1)
-
-    if (!defaultAgent)
-      throw createError({ statusCode: 500, message: 'No default agent configured' })
+  const resolvedAgentId = agentId || await getDefaultAgentId()
+  const key = cacheKey(resolvedAgentId, userId)
 
-    resolvedAgentId = defaultAgent.id
+  const cached = agents.get(key)
+  if (cached) {
+    // Knowledge is served from the loader's watched cache, so this is cheap;
+    // a changed snapshot means the agent's prompt is out of date
+    const [entry, knowledge] = await Promise.all([
+      cached,
+      timeStage('knowledge', () => getKnowledgeLoader().load(resolvedAgentId))
+    ])
+    if (entry.knowledge === knowledge)
+      return entry.agent
+    if (agents.get(key) === cached)
+      agents.delete(key)
   }
 
-  // Check cache
-  const key = cacheKey(resolvedAgentId, userId)
-  const cached = cache.get(key)
-  if (cached && Date.now() - cached.loadedAt < CACHE_TTL_MS)
-    return cached.agent
+  const entry = await singleFlight(agents, key, () => buildAgent(resolvedAgentId, userId))
+  return entry.agent
+}
+
+async function buildAgent(agentId: string, userId: string): Promise<CacheEntry> {
+  const db = getDb()
 
   // Load agent record
   const [agentRecord] = await db.select()
     .from(schema.installedAgents)
-    .where(eq(schema.installedAgents.id, resolvedAgentId))
+    .where(eq(schema.installedAgents.id, agentId))
     .limit(1)
 
   if (!agentRecord)
@@ -62,58 +126,110 @@ export async function loadAgent(
   if (!agentRecord.enabled)
     throw createError({ statusCode: 400, message: 'Agent is disabled' })
 
-  // Load user-specific config
-  const [configRecord] = await db.select()
-    .from(schema.agentConfigs)
-    .where(and(
-      eq(schema.agentConfigs.agentId, resolvedAgentId),
-      eq(schema.agentConfigs.userId, userId)
-    ))
-    .limit(1)
+  // User-specific config, knowledge and the agent module are independent
+  const [[configRecord], knowledge, createAgent] = await Promise.all([
+    db.select()
+      .from(schema.agentConfigs)
+      .where(and(
+        eq(schema.agentConfigs.agentId, agentId),
+        eq(schema.agentConfigs.userId, userId)
+      ))
+      .limit(1),
+    timeStage('knowledge', () => getKnowledgeLoader().load(agentId)),
+    loadAgentModule(agentRecord)
+  ])
 
   const agentConfig = (configRecord?.configJson ?? {}) as Record<string, unknown>
 
-  // Load knowledge
-  const knowledge = await getKnowledgeLoader().load(resolvedAgentId)
+  // In retrieval mode the agent sees no pasted knowledge text — relevant
+  // chunks are injected per turn by the chat endpoint instead.
+  const runtimeConfig = useRuntimeConfig()
+  const knowledgeMode = runtimeConfig.knowledgeMode === 'retrieval' ? 'retrieval' : 'full'
 
   // Build context — pass tool/z utilities so external agents use the same
   // module instances as the bundled server (avoids jiti dual-instance issues)
   const context = {
     getConfig: async () => agentConfig,
-    knowledge,
-    getModel: () => resolveModelForAgent(resolvedAgentId, userId),
+    knowledge: knowledgeMode === 'retrieval' ? { ...knowledge, text: '' } : knowledge,
+    getModel: async () => (await resolveModelForAgent(agentId, userId)).model,
     userId,
     utils: { tool, z }
   }
 
-  // Load the agent's createAgent function
-  let cognovaAgent: CognovaAgent
+  const cognovaAgent = await createAgent(agentConfig, context)
 
-  if (agentRecord.builtIn) {
-    const { createAgent } = await import('~~/server/agents/built-in/default/index')
-    cognovaAgent = await createAgent(agentConfig, context)
-  } else if (agentRecord.localPath) {
-    const jiti = createJiti(import.meta.url)
-    const mod = await jiti.import(join(agentRecord.localPath, 'index')) as { createAgent?: CreateAgentFn }
-    if (!mod.createAgent)
-      throw createError({ statusCode: 500, message: 'Agent module missing createAgent export' })
-    cognovaAgent = await mod.createAgent(agentConfig, context)
-  } else {
-    throw createError({ statusCode: 500, message: 'Agent has no source path configured' })
+  let tools = cognovaAgent.tools
+  if (knowledgeMode === 'retrieval' && knowledge.files.length && !tools?.searchKnowledge) {
+    const topK = Number(runtimeConfig.knowledgeTopK) || 5
+    tools = { ...tools, searchKnowledge: createKnowledgeSearchTool(knowledge, topK) }
   }
 
-  // Cache
-  cache.set(key, { agent: cognovaAgent, loadedAt: Date.now() })
-  return cognovaAgent
+  const loaded: LoadedAgent = { ...cognovaAgent, tools, knowledge, knowledgeMode }
+
+  // A tool call needs at least one follow-up step to produce an answer
+  if (tools?.searchKnowledge && (loaded.maxSteps || 1) < 2)
+    loaded.maxSteps = 2
+
+  return { agent: loaded, knowledge }
 }
 
-export function invalidateAgentCache(agentId?: string): void {
+/**
+ * Drop cached createAgent() results. With a userId only that user's instance
+ * is dropped (their config changed); otherwise every user's instance of the
+ * agent, or of all agents when agentId is omitted.
+ */
+export function invalidateAgentCache(agentId?: string, userId?: string): void {
+  if (agentId && userId) {
+    agents.delete(cacheKey(agentId, userId))
+    return
+  }
+
+  // The agent record drives model resolution and default selection, so drop those too
+  invalidateResolvedModels(agentId ? { agentId } : {})
+  defaultAgentId = null
   if (agentId) {
-    for (const key of cache.keys()) {
+    for (const key of agents.keys()) {
       if (key.startsWith(`${agentId}:`))
-        cache.delete(key)
+        agents.delete(key)
     }
   } else {
-    cache.clear()
+    agents.clear()
   }
 }
+
+/**
+ * Drop the compiled module as well, so the next load re-imports the agent's
+ * source. Used when the code on disk has changed or the agent is removed.
+ */
+export function invalidateAgentModule(agentId?: string): void {
+  if (agentId)
+    modules.delete(agentId)
+  else
+    modules.clear()
+  invalidateAgentCache(agentId)
+}
+
+/**
+ * Import every enabled agent's module and load its knowledge so the first
+ * chat after startup skips the transpile and the knowledge scan.
+ */
+export async function prewarmAgents(): Promise<number> {
+  const records = await getDb().select()
+    .from(schema.installedAgents)
+    .where(eq(schema.installedAgents.enabled, true))
+
+  const results = await Promise.allSettled(records.map(record => Promise.all([
+    loadAgentModule(record),
+    getKnowledgeLoader().load(record.id)
+  ])))
+
+  results.forEach((result, i) => {
+    if (result.status === 'rejected')
+      console.warn(`[agents] Failed to pre-warm ${records[i]!.name}:`, result.reason)
+  })
+
+  if (records.some(r => r.builtIn))
+    await getDefaultAgentId().catch(() => {})
+
+  return results.filter(r => r.status === 'fulfilled').length
+}
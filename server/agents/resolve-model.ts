@@ -1,29 +1,62 @@
-import type { LanguageModel } from 'ai'
 import { eq } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
-import { getModel } from '~~/server/ai/get-model'
+import { getModel, type ResolvedModel } from '~~/server/ai/get-model'
+import { singleFlight } from '~~/server/utils/concurrency'
 import type { AgentManifest } from '~~/shared/types/agent'
 
+// Resolved models keyed by agentId:userId. Entries hold the in-flight promise
+// so concurrent misses share one resolution. No TTL — the provider, model,
+// settings and agent handlers call invalidateResolvedModels() on change.
+const cache = new Map<string, Promise<ResolvedModel>>()
+
+function cacheKey(agentId: string | null, userId: string): string {
+  return `${agentId ?? ''}:${userId}`
+}
+
 export async function resolveModelForAgent(
   agentId: string | null,
   userId: string
-): Promise<LanguageModel> {
+): Promise<ResolvedModel> {
+  return singleFlight(cache, cacheKey(agentId, userId), () => resolveUncached(agentId, userId))
+}
+
+/**
+ * Drop cached model resolutions. Filters combine: omit both to clear everything.
+ */
+export function invalidateResolvedModels(filter: { agentId?: string, userId?: string } = {}): void {
+  if (!filter.agentId && !filter.userId) {
+    cache.clear()
+    return
+  }
+  for (const key of cache.keys()) {
+    const [agentId, userId] = key.split(':')
+    if (filter.agentId && agentId !== filter.agentId)
+      continue
+    if (filter.userId && userId !== filter.userId)
+      continue
+    cache.delete(key)
+  }
+}
+
+async function resolveUncached(
+  agentId: string | null,
+  userId: string
+): Promise<ResolvedModel> {
   const db = getDb()
 
-  // If agent specifies an explicit modelId, use it (highest priority)
+  let manifest: AgentManifest | undefined
   if (agentId) {
     const [agent] = await db.select()
       .from(schema.installedAgents)
       .where(eq(schema.installedAgents.id, agentId))
       .limit(1)
-
-    if (agent) {
-      const manifest = agent.manifestJson as AgentManifest
-      if (manifest.model?.modelId)
-        return getModel({ modelId: manifest.model.modelId, userId })
-    }
+    manifest = agent?.manifestJson as AgentManifest | undefined
   }
 
+  // If agent specifies an explicit modelId, use it (highest priority)
+  if (manifest?.model?.modelId)
+    return getModel({ modelId: manifest.model.modelId, userId })
+
   // User's default model setting takes priority over agent tags
   const [setting] = await db.select()
     .from(schema.appSettings)
@@ -34,18 +67,8 @@ export async function resolveModelForAgent(
     return getModel({ modelId: setting.value as string, userId })
 
   // Fall back to agent manifest tags
-  if (agentId) {
-    const [agent] = await db.select()
-      .from(schema.installedAgents)
-      .where(eq(schema.installedAgents.id, agentId))
-      .limit(1)
-
-    if (agent) {
-      const manifest = agent.manifestJson as AgentManifest
-      if (manifest.model?.tags?.length)
-        return getModel({ tags: manifest.model.tags, userId })
-    }
-  }
+  if (manifest?.model?.tags?.length)
+    return getModel({ tags: manifest.model.tags, userId })
 
   // Last resort: try any model tagged 'frontier'
   return getModel({ tags: ['frontier'], userId })
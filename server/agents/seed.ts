@@ -0,0 +1,47 @@
+import { eq, and } from 'drizzle-orm'
+import { getDb, schema } from '~~/server/db'
+
+let seeding: Promise<void> | null = null
+
+async function seed(): Promise<void> {
+  try {
+    const db = getDb()
+
+    const existing = await db.select()
+      .from(schema.installedAgents)
+      .where(and(
+        eq(schema.installedAgents.builtIn, true),
+        eq(schema.installedAgents.name, 'Default Assistant')
+      ))
+      .limit(1)
+
+    if (existing.length > 0)
+      return
+
+    await db.insert(schema.installedAgents).values({
+      name: 'Default Assistant',
+      builtIn: true,
+      enabled: true,
+      manifestJson: {
+        id: 'default',
+        name: 'Default Assistant',
+        description: 'A general-purpose AI assistant',
+        version: '1.0.0',
+        model: { tags: ['frontier'] }
+      }
+    })
+
+    console.log('[seed] Default agent created')
+  } catch (error) {
+    console.error('[seed] Failed to seed default agent:', error)
+  }
+}
+
+/**
+ * Seed the built-in default agent once per process. Nitro does not await
+ * async plugins, so later plugins that need the agent await this instead.
+ */
+export function seedDefaultAgent(): Promise<void> {
+  seeding ||= seed()
+  return seeding
+}
@@ -0,0 +1,25 @@
+import { tool } from 'ai'
+import { z } from 'zod'
+import type { AgentKnowledge } from '~~/shared/types/agent'
+
+/**
+ * Built-in retrieval tool — lets the model pull additional knowledge chunks
+ * beyond the ones injected for the latest user message.
+ */
+export function createKnowledgeSearchTool(knowledge: AgentKnowledge, defaultK: number) {
+  return tool({
+    description: 'Search this agent\'s knowledge files. Returns the most relevant excerpts for the query.',
+    inputSchema: z.object({
+      query: z.string().describe('Keywords or a question describing what to look up'),
+      limit: z.number().min(1).max(20).optional().describe(`Maximum excerpts to return (default ${defaultK})`)
+    }),
+    execute: async ({ query, limit }) => {
+      const results = knowledge.search(query, limit ?? defaultK)
+      if (!results.length)
+        return { results: [], message: 'No matching knowledge found' }
+      return {
+        results: results.map(r => ({ path: r.path, heading: r.heading, text: r.text }))
+      }
+    }
+  })
+}
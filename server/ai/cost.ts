@@ -1,25 +1,58 @@
+interface ModelPricing {
+  input: number
+  output: number
+  // Cached input. Reads are discounted; writes cost a premium on Anthropic.
+  // Unset means the provider bills cached tokens at the normal input rate.
+  cacheRead?: number
+  cacheWrite?: number
+}
+
 // Pricing in USD per million tokens
-const PRICING: Record<string, { input: number, output: number }> = {
-  // Anthropic
-  'claude-opus-4-6': { input: 15.0, output: 75.0 },
-  'claude-sonnet-4-5-20250929': { input: 3.0, output: 15.0 },
-  'claude-haiku-4-5-20251001': { input: 0.80, output: 4.0 },
-  // OpenAI
-  'gpt-4o': { input: 2.5, output: 10.0 },
-  'gpt-4o-mini': { input: 0.15, output: 0.60 },
-  'gpt-4.1': { input: 2.0, output: 8.0 },
-  'o3-mini': { input: 1.10, output: 4.40 },
+const PRICING: Record<string, ModelPricing> = {
+  // Anthropic — cache reads 0.1x input, 5-minute cache writes 1.25x input
+  'claude-opus-4-6': { input: 15.0, output: 75.0, cacheRead: 1.50, cacheWrite: 18.75 },
+  'claude-sonnet-4-5-20250929': { input: 3.0, output: 15.0, cacheRead: 0.30, cacheWrite: 3.75 },
+  'claude-haiku-4-5-20251001': { input: 0.80, output: 4.0, cacheRead: 0.08, cacheWrite: 1.0 },
+  // OpenAI — automatic prefix caching, no write premium
+  'gpt-4o': { input: 2.5, output: 10.0, cacheRead: 1.25 },
+  'gpt-4o-mini': { input: 0.15, output: 0.60, cacheRead: 0.075 },
+  'gpt-4.1': { input: 2.0, output: 8.0, cacheRead: 0.50 },
+  'o3-mini': { input: 1.10, output: 4.40, cacheRead: 0.55 },
   // Google
-  'gemini-2.5-pro': { input: 1.25, output: 10.0 },
-  'gemini-2.0-flash': { input: 0.10, output: 0.40 },
+  'gemini-2.5-pro': { input: 1.25, output: 10.0, cacheRead: 0.31 },
+  'gemini-2.0-flash': { input: 0.10, output: 0.40, cacheRead: 0.025 },
   // xAI
-  'grok-3': { input: 3.0, output: 15.0 },
-  'grok-3-mini': { input: 0.30, output: 0.50 }
+  'grok-3': { input: 3.0, output: 15.0, cacheRead: 0.75 },
+  'grok-3-mini': { input: 0.30, output: 0.50, cacheRead: 0.075 }
+}
+
+export interface CachedTokens {
+  cacheReadTokens?: number
+  cacheWriteTokens?: number
 }
 
-export function estimateCost(modelId: string, inputTokens: number, outputTokens: number): number {
+/**
+ * Estimate the cost of a call. `inputTokens` is the total prompt size,
+ * including any tokens read from or written to the provider's prompt cache.
+ */
+export function estimateCost(
+  modelId: string,
+  inputTokens: number,
+  outputTokens: number,
+  cached: CachedTokens = {}
+): number {
   const pricing = PRICING[modelId]
   if (!pricing)
     return 0
-  return (inputTokens * pricing.input + outputTokens * pricing.output) / 1_000_000
+
+  const cacheRead = cached.cacheReadTokens || 0
+  const cacheWrite = cached.cacheWriteTokens || 0
+  const uncached = Math.max(0, inputTokens - cacheRead - cacheWrite)
+
+  return (
+    uncached * pricing.input
+    + cacheRead * (pricing.cacheRead ?? pricing.input)
+    + cacheWrite * (pricing.cacheWrite ?? pricing.input)
+    + outputTokens * pricing.output
+  ) / 1_000_000
 }
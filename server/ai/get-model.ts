@@ -1,5 +1,5 @@
 import type { LanguageModel } from 'ai'
-import { and, eq } from 'drizzle-orm'
+import { and, arrayContains, arrayOverlaps, asc, eq, type SQL } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
 import { decryptProviderConfig } from '~~/server/utils/provider-config'
 import { createAIModel } from '~~/server/ai/provider-factory'
@@ -16,47 +16,50 @@ interface GetModelByTagsOptions {
 
 type GetModelOptions = GetModelByIdOptions | GetModelByTagsOptions
 
+// The model plus the provider instance it came from, for usage attribution
+export interface ResolvedModel {
+  model: LanguageModel
+  providerId: string
+}
+
 function hasModelId(opts: GetModelOptions): opts is GetModelByIdOptions {
   return 'modelId' in opts
 }
 
-export async function getModel(options: GetModelOptions): Promise<LanguageModel> {
-  const db = getDb()
+function selectModels(where: SQL | undefined) {
+  return getDb().select()
+    .from(schema.models)
+    .innerJoin(schema.providers, eq(schema.models.providerId, schema.providers.id))
+    .innerJoin(schema.providerTypes, eq(schema.providers.typeId, schema.providerTypes.id))
+    .where(where)
+    .orderBy(asc(schema.models.createdAt))
+    .limit(1)
+}
 
-  let modelRecord: {
-    models: typeof schema.models.$inferSelect
-    providers: typeof schema.providers.$inferSelect
-    provider_types: typeof schema.providerTypes.$inferSelect
-  } | undefined
+export async function getModel(options: GetModelOptions): Promise<ResolvedModel> {
+  let modelRecord: Awaited<ReturnType<typeof selectModels>>[number] | undefined
 
   if (hasModelId(options)) {
-    const rows = await db.select()
-      .from(schema.models)
-      .innerJoin(schema.providers, eq(schema.models.providerId, schema.providers.id))
-      .innerJoin(schema.providerTypes, eq(schema.providers.typeId, schema.providerTypes.id))
-      .where(and(
-        eq(schema.models.id, options.modelId),
-        eq(schema.providers.userId, options.userId)
-      ))
-      .limit(1)
+    const rows = await selectModels(and(
+      eq(schema.models.id, options.modelId),
+      eq(schema.providers.userId, options.userId)
+    ))
     modelRecord = rows[0]
   } else {
-    const allModels = await db.select()
-      .from(schema.models)
-      .innerJoin(schema.providers, eq(schema.models.providerId, schema.providers.id))
-      .innerJoin(schema.providerTypes, eq(schema.providers.typeId, schema.providerTypes.id))
-      .where(eq(schema.providers.userId, options.userId))
-
     // Try exact match (all tags present)
-    modelRecord = allModels.find(m =>
-      options.tags.every(tag => (m.models.tags || []).includes(tag))
-    )
+    const [exact] = await selectModels(and(
+      eq(schema.providers.userId, options.userId),
+      arrayContains(schema.models.tags, options.tags)
+    ))
+    modelRecord = exact
 
     // Fallback to partial match
     if (!modelRecord) {
-      modelRecord = allModels.find(m =>
-        options.tags.some(tag => (m.models.tags || []).includes(tag))
-      )
+      const [partial] = await selectModels(and(
+        eq(schema.providers.userId, options.userId),
+        arrayOverlaps(schema.models.tags, options.tags)
+      ))
+      modelRecord = partial
       if (modelRecord)
         console.warn(`[ai] No model matched all tags [${options.tags}], fell back to partial match: ${modelRecord.models.modelId}`)
     }
@@ -67,10 +70,12 @@ export async function getModel(options: GetModelOptions): Promise<LanguageModel>
 
   const config = decryptProviderConfig(modelRecord.providers.configJson)
 
-  return createAIModel(
+  const model = await createAIModel(
     modelRecord.provider_types.id,
     modelRecord.provider_types.aiSdkPackage,
     config,
-    modelRecord.models.modelId
+    modelRecord.models.modelId,
+    modelRecord.providers.id
   )
+  return { model, providerId: modelRecord.providers.id }
 }
@@ -0,0 +1,42 @@
+import type { JSONObject, SystemModelMessage, ToolSet } from 'ai'
+
+// Anthropic only caches up to explicit breakpoints; other providers ignore this.
+const ANTHROPIC_BREAKPOINT = { anthropic: { cacheControl: { type: 'ephemeral' } } }
+
+/**
+ * Build the system messages for a turn so the provider can cache the stable prefix.
+ *
+ * The agent prompt (including full-text knowledge) goes first and carries the
+ * cache breakpoint. Per-turn context such as retrieved knowledge or the rolling
+ * summary goes in a second message after it, so it never changes the cached bytes.
+ */
+export function buildSystemMessages(stablePrompt: string, turnContext: string[]): SystemModelMessage[] {
+  const messages: SystemModelMessage[] = [
+    { role: 'system', content: stablePrompt, providerOptions: ANTHROPIC_BREAKPOINT }
+  ]
+
+  const dynamic = turnContext.filter(Boolean).join('\n\n')
+  if (dynamic)
+    messages.push({ role: 'system', content: dynamic })
+
+  return messages
+}
+
+/**
+ * Tool definitions are part of the cached prefix — emit them in a fixed order.
+ */
+export function sortTools(tools?: ToolSet): ToolSet | undefined {
+  if (!tools)
+    return undefined
+  return Object.fromEntries(Object.keys(tools).sort().map(name => [name, tools[name]!]))
+}
+
+/**
+ * Request-level provider options. OpenAI caches prefixes automatically; a
+ * stable key routes repeat prompts for the same agent/user to the same cache.
+ */
+export function promptCacheOptions(cacheKey: string): Record<string, JSONObject> {
+  return {
+    openai: { promptCacheKey: cacheKey }
+  }
+}
@@ -1,4 +1,5 @@
 import type { LanguageModel } from 'ai'
+import { singleFlight } from '~~/server/utils/concurrency'
 
 type AIModel = LanguageModel & { modelId: string }
 
@@ -7,32 +8,61 @@ function sanitizeForHeader(value: string): string {
   return value.replace(/[^ -~]/g, '')
 }
 
+type ProviderClient = (modelId: string) => AIModel
+
+// One client per configured provider instance, so requests to the same
+// base URL share the SDK's fetch/keep-alive state instead of rebuilding it
+const clients = new Map<string, Promise<ProviderClient>>()
+
+/**
+ * Create a model for a provider. When `providerId` is given the underlying
+ * client is cached until invalidateProviderClient() is called for it.
+ */
 export async function createAIModel(
   typeId: string,
   _aiSdkPackage: string,
   config: Record<string, unknown>,
-  modelId: string
+  modelId: string,
+  providerId?: string
 ): Promise<AIModel> {
+  if (!providerId)
+    return (await createProviderClient(typeId, config))(modelId)
+
+  const client = await singleFlight(clients, providerId, () => createProviderClient(typeId, config))
+  return client(modelId)
+}
+
+export function invalidateProviderClient(providerId?: string): void {
+  if (providerId)
+    clients.delete(providerId)
+  else
+    clients.clear()
+}
+
+async function createProviderClient(
+  typeId: string,
+  config: Record<string, unknown>
+): Promise<ProviderClient> {
   switch (typeId) {
     case 'anthropic': {
       const { createAnthropic } = await import('@ai-sdk/anthropic')
       const provider = createAnthropic({ apiKey: config.apiKey as string })
-      return provider(modelId) as AIModel
+      return modelId => provider(modelId) as AIModel
     }
     case 'openai': {
       const { createOpenAI } = await import('@ai-sdk/openai')
       const provider = createOpenAI({ apiKey: config.apiKey as string })
-      return provider(modelId) as AIModel
+      return modelId => provider(modelId) as AIModel
     }
     case 'google': {
       const { createGoogleGenerativeAI } = await import('@ai-sdk/google')
       const provider = createGoogleGenerativeAI({ apiKey: config.apiKey as string })
-      return provider(modelId) as AIModel
+      return modelId => provider(modelId) as AIModel
     }
     case 'xai': {
       const { createXai } = await import('@ai-sdk/xai')
       const provider = createXai({ apiKey: config.apiKey as string })
-      return provider(modelId) as AIModel
+      return modelId => provider(modelId) as AIModel
     }
     case 'openai-compatible': {
       const { createOpenAICompatible } = await import('@ai-sdk/openai-compatible')
@@ -42,16 +72,18 @@ export async function createAIModel(
       const provider = createOpenAICompatible({
         name: safeName,
         baseURL: config.baseURL as string,
-        headers: apiKey ? { Authorization: `Bearer ${apiKey}` } : undefined
+        headers: apiKey ? { Authorization: `Bearer ${apiKey}` } : undefined,
+        // Ask for usage on streamed responses; otherwise token logging sees zeros
+        includeUsage: true
       })
-      return provider(modelId) as AIModel
+      return modelId => provider(modelId) as AIModel
     }
     case 'ollama': {
       const { createOllama } = await import('ollama-ai-provider')
       const provider = createOllama({
         baseURL: (config.baseURL as string) || 'http://localhost:11434/api'
       })
-      return provider(modelId) as unknown as AIModel
+      return modelId => provider(modelId) as unknown as AIModel
     }
     default:
       throw new Error(`Unknown provider type: ${typeId}`)
@@ -0,0 +1,9 @@
+// Rough token estimate (~4 chars per token for English text). Good enough for
+// budgeting prompt size without pulling a tokenizer into the server bundle.
+const CHARS_PER_TOKEN = 4
+
+export function estimateTokens(text: string): number {
+  if (!text)
+    return 0
+  return Math.ceil(text.length / CHARS_PER_TOKEN)
+}
@@ -1,3 +1,5 @@
+import type { LanguageModelUsage } from 'ai'
+import { eq, inArray, sql, type SQL } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
 import { estimateCost } from '~~/server/ai/cost'
 
@@ -8,22 +10,154 @@ interface LogUsageInput {
   source: 'chat' | 'agent' | 'memory' | 'cron'
   inputTokens: number
   outputTokens: number
+  // Portions of inputTokens served from / written to the provider's prompt cache
+  cacheReadTokens?: number
+  cacheWriteTokens?: number
 }
 
-export async function logTokenUsage(input: LogUsageInput): Promise<void> {
+type UsageRow = typeof schema.tokenUsage.$inferInsert
+
+// Write-behind buffer: usage is queued on the request path and flushed in
+// batches on size, on interval, and on shutdown (see 01.database plugin)
+const FLUSH_BATCH_SIZE = 100
+const FLUSH_INTERVAL_MS = 5000
+// Cap retained rows if the DB is unreachable for a long time
+const MAX_BUFFERED = 10_000
+
+// Flushes hold this advisory lock shared; the backfill holds it exclusively,
+// so a rebuild never interleaves with an incremental upsert
+const ROLLUP_LOCK = sql`hashtext('token_usage_daily')`
+// app_settings key recording that the rollup was rebuilt from history;
+// internal, so the settings API does not return it
+const BACKFILL_MARKER = 'usageRollupBackfilledAt'
+
+let buffer: UsageRow[] = []
+let timer: ReturnType<typeof setInterval> | null = null
+let flushing: Promise<void> = Promise.resolve()
+
+/**
+ * Prompt-cache token counts from an AI SDK usage object. Providers that do not
+ * report cache usage yield zeros.
+ */
+export function getCacheUsage(usage: LanguageModelUsage): { cacheReadTokens: number, cacheWriteTokens: number } {
+  return {
+    cacheReadTokens: usage.inputTokenDetails?.cacheReadTokens ?? usage.cachedInputTokens ?? 0,
+    cacheWriteTokens: usage.inputTokenDetails?.cacheWriteTokens ?? 0
+  }
+}
+
+export function logTokenUsage(input: LogUsageInput): void {
   try {
-    const cost = estimateCost(input.modelId, input.inputTokens, input.outputTokens)
-    const db = getDb()
-    await db.insert(schema.tokenUsage).values({
+    const cacheReadTokens = input.cacheReadTokens || 0
+    const cacheWriteTokens = input.cacheWriteTokens || 0
+    const cost = estimateCost(input.modelId, input.inputTokens, input.outputTokens, { cacheReadTokens, cacheWriteTokens })
+    buffer.push({
       userId: input.userId,
       providerId: input.providerId || null,
       modelId: input.modelId,
       source: input.source,
       inputTokens: input.inputTokens,
       outputTokens: input.outputTokens,
-      cost
+      cacheReadTokens,
+      cacheWriteTokens,
+      cost,
+      createdAt: new Date()
     })
+
+    if (!timer) {
+      timer = setInterval(() => flushTokenUsage(), FLUSH_INTERVAL_MS)
+      timer.unref()
+    }
+
+    if (buffer.length >= FLUSH_BATCH_SIZE)
+      flushTokenUsage()
   } catch (error) {
     console.error('[usage] Failed to log token usage:', error)
   }
 }
+
+/**
+ * Write all buffered usage to token_usage and fold it into token_usage_daily.
+ * Flushes are serialized; rows from a failed flush are re-queued.
+ */
+export function flushTokenUsage(): Promise<void> {
+  flushing = flushing.then(async () => {
+    while (buffer.length) {
+      const batch = buffer.slice(0, FLUSH_BATCH_SIZE)
+      buffer = buffer.slice(batch.length)
+      try {
+        await writeBatch(batch)
+      } catch (error) {
+        console.error(`[usage] Failed to flush ${batch.length} usage rows:`, error)
+        buffer = [...batch, ...buffer].slice(-MAX_BUFFERED)
+        return
+      }
+    }
+  })
+  return flushing
+}
+
+/**
+ * Fold token_usage rows (all of them, or those matching `where`) into
+ * token_usage_daily, adding to any existing daily totals.
+ */
+function rollupUsage(where?: SQL): SQL {
+  return sql`
+    INSERT INTO token_usage_daily
+      (user_id, day, model_id, provider_id, source, input_tokens, output_tokens,
+      cache_read_tokens, cache_write_tokens, cost, calls)
+    SELECT user_id, created_at::date, coalesce(model_id, ''), coalesce(provider_id::text, ''), source,
+      sum(input_tokens), sum(output_tokens), sum(cache_read_tokens), sum(cache_write_tokens),
+      coalesce(sum(cost), 0), count(*)
+    FROM token_usage
+    ${where ? sql`WHERE ${where}` : sql``}
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (user_id, day, model_id, provider_id, source) DO UPDATE SET
+      input_tokens = token_usage_daily.input_tokens + excluded.input_tokens,
+      output_tokens = token_usage_daily.output_tokens + excluded.output_tokens,
+      cache_read_tokens = token_usage_daily.cache_read_tokens + excluded.cache_read_tokens,
+      cache_write_tokens = token_usage_daily.cache_write_tokens + excluded.cache_write_tokens,
+      cost = token_usage_daily.cost + excluded.cost,
+      calls = token_usage_daily.calls + excluded.calls
+  `
+}
+
+async function writeBatch(rows: UsageRow[]): Promise<void> {
+  const db = getDb()
+  await db.transaction(async (tx) => {
+    await tx.execute(sql`SELECT pg_advisory_xact_lock_shared(${ROLLUP_LOCK})`)
+
+    const inserted = await tx.insert(schema.tokenUsage)
+      .values(rows)
+      .returning({ id: schema.tokenUsage.id })
+
+    await tx.execute(rollupUsage(inArray(schema.tokenUsage.id, inserted.map(r => r.id))))
+  })
+}
+
+/**
+ * Rebuild token_usage_daily from the full token_usage history, once per
+ * database. Runs under the exclusive rollup lock so in-flight flushes finish
+ * first and new ones wait; the marker check happens under the same lock so
+ * concurrent nodes don't rebuild twice.
+ */
+export async function backfillUsageRollup(): Promise<boolean> {
+  return getDb().transaction(async (tx) => {
+    await tx.execute(sql`SELECT pg_advisory_xact_lock(${ROLLUP_LOCK})`)
+
+    const [marker] = await tx.select({ id: schema.appSettings.id })
+      .from(schema.appSettings)
+      .where(eq(schema.appSettings.key, BACKFILL_MARKER))
+      .limit(1)
+
+    if (marker)
+      return false
+
+    await tx.delete(schema.tokenUsageDaily)
+    await tx.execute(rollupUsage())
+    await tx.insert(schema.appSettings)
+      .values({ key: BACKFILL_MARKER, value: new Date().toISOString() })
+
+    return true
+  })
+}
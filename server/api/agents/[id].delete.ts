@@ -1,5 +1,5 @@
 import { uninstallAgent } from '~~/server/agents/installer'
-import { invalidateAgentCache } from '~~/server/agents/loader'
+import { invalidateAgentModule } from '~~/server/agents/loader'
 
 export default defineEventHandler(async (event) => {
   const id = getRouterParam(event, 'id')
@@ -7,7 +7,7 @@ export default defineEventHandler(async (event) => {
     throw createError({ statusCode: 400, message: 'Agent ID is required' })
 
   await uninstallAgent(id)
-  invalidateAgentCache(id)
+  invalidateAgentModule(id)
 
   return { data: { deleted: true } }
 })
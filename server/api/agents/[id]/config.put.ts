@@ -36,6 +36,7 @@ export default defineEventHandler(async (event) => {
       })
   }
 
-  invalidateAgentCache(agentId)
+  // Config is per user, so only this user's agent instance is stale
+  invalidateAgentCache(agentId, userId)
   return { data: { saved: true } }
 })
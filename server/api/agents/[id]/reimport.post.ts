@@ -1,5 +1,4 @@
 import { reimportAgent } from '~~/server/agents/installer'
-import { invalidateAgentCache } from '~~/server/agents/loader'
 import { getKnowledgeLoader } from '~~/server/knowledge'
 
 export default defineEventHandler(async (event) => {
@@ -9,8 +8,8 @@ export default defineEventHandler(async (event) => {
 
   await reimportAgent(agentId)
 
-  // Invalidate caches so next chat loads fresh agent + knowledge
-  invalidateAgentCache(agentId)
+  // reimportAgent drops the compiled module and agent instances;
+  // knowledge was re-copied, so rescan it too
   getKnowledgeLoader().invalidate(agentId)
 
   return { data: { success: true } }
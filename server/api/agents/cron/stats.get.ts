@@ -0,0 +1,38 @@
+import { and, eq, lte, min, sql } from 'drizzle-orm'
+import { getDb, schema } from '~~/server/db'
+import { getCronScheduler } from '~~/server/cron'
+
+export default defineEventHandler(async (event) => {
+  const db = getDb()
+
+  // Scheduler stats span every user's runs and expose node internals
+  const [user] = await db.select({ role: schema.user.role })
+    .from(schema.user)
+    .where(eq(schema.user.id, event.context.user.id))
+    .limit(1)
+  if (user?.role !== 'admin')
+    throw createError({ statusCode: 403, message: 'Admin access required' })
+
+  const c = schema.cronAgents
+  // next_run_at holds UTC wall time, so compare and measure against a JS Date
+  // rather than now(), which depends on the session TimeZone
+  const now = new Date()
+
+  // Runs that are due but not yet claimed by any node
+  const [queue] = await db.select({
+    due: sql<number>`count(*)`.mapWith(Number),
+    oldest: min(c.nextRunAt)
+  })
+    .from(c)
+    .where(and(eq(c.enabled, true), lte(c.nextRunAt, now)))
+
+  return {
+    data: {
+      ...getCronScheduler().getStats(),
+      queue: {
+        due: queue?.due ?? 0,
+        oldestLagMs: queue?.oldest ? Math.max(0, now.getTime() - queue.oldest.getTime()) : 0
+      }
+    }
+  }
+})
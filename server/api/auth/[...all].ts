@@ -1,7 +1,34 @@
 import { getAuth } from '~~/server/utils/auth'
+import { getSessionUserId, evictUserSessions } from '~~/server/utils/session-cache'
 import { toNodeHandler } from 'better-auth/node'
 
-export default defineEventHandler((event) => {
+// Endpoints that end, revoke or alter sessions (or the user they carry).
+// Cached sessions for the user are evicted once the request completes.
+const SESSION_MUTATING_PATHS = [
+  '/api/auth/sign-out',
+  '/api/auth/revoke-session',
+  '/api/auth/revoke-sessions',
+  '/api/auth/revoke-other-sessions',
+  '/api/auth/change-password',
+  '/api/auth/update-user',
+  '/api/auth/delete-user',
+  '/api/auth/api-key/update',
+  '/api/auth/api-key/delete'
+]
+
+export default defineEventHandler(async (event) => {
   const handler = toNodeHandler(getAuth())
-  return handler(event.node.req, event.node.res)
+
+  const path = getRequestURL(event).pathname
+  if (!SESSION_MUTATING_PATHS.some(p => path.startsWith(p)))
+    return handler(event.node.req, event.node.res)
+
+  // Resolve the user before the session is destroyed
+  const userId = await getSessionUserId(event.headers)
+  try {
+    return await handler(event.node.req, event.node.res)
+  } finally {
+    if (userId)
+      evictUserSessions(userId)
+  }
 })
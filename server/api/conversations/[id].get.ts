@@ -1,5 +1,7 @@
-import { eq, and, asc } from 'drizzle-orm'
+import { eq, and } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import { listMessagePage } from '~~/server/conversations/history'
+import { parseLimit } from '~~/server/utils/pagination'
 
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
@@ -7,6 +9,7 @@ export default defineEventHandler(async (event) => {
   if (!id)
     throw createError({ statusCode: 400, message: 'Conversation ID is required' })
 
+  const query = getQuery(event)
   const db = getDb()
 
   const [conversation] = await db.select()
@@ -20,10 +23,8 @@ export default defineEventHandler(async (event) => {
   if (!conversation)
     throw createError({ statusCode: 404, message: 'Conversation not found' })
 
-  const messages = await db.select()
-    .from(schema.messages)
-    .where(eq(schema.messages.conversationId, id))
-    .orderBy(asc(schema.messages.createdAt))
+  // Latest page only — older messages via GET /api/conversations/:id/messages
+  const { messages, nextCursor } = await listMessagePage(id, parseLimit(query.limit), null)
 
-  return { data: { conversation, messages } }
+  return { data: { conversation, messages, nextCursor } }
 })
@@ -1,20 +1,45 @@
-import { streamText, convertToModelMessages, stepCountIs, type UIMessage } from 'ai'
+import { randomUUID } from 'crypto'
+import { streamText, convertToModelMessages, stepCountIs, type ToolResultPart, type UIMessage } from 'ai'
 import { eq, and } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
 import { loadAgent } from '~~/server/agents/loader'
 import { resolveModelForAgent } from '~~/server/agents/resolve-model'
-import { logTokenUsage } from '~~/server/ai/usage'
+import { getCacheUsage, logTokenUsage } from '~~/server/ai/usage'
+import { buildSystemMessages, promptCacheOptions, sortTools } from '~~/server/ai/prompt-cache'
+import { estimateTokens } from '~~/server/ai/tokens'
+import { formatSearchResults } from '~~/server/knowledge/search-index'
+import { loadContextWindow, updateRollingSummary } from '~~/server/conversations/history'
+import { recordStage, timeStage } from '~~/server/utils/metrics'
+import { dbMessageToUIMessage } from '~~/shared/utils/message-converter'
 import type { MessageMetadata } from '~~/shared/types'
 
+// Tool results in response messages wrap the tool's return value by kind;
+// UI tool parts store the raw value (or the error text)
+function toolResultState(output: ToolResultPart['output']): Record<string, unknown> {
+  switch (output.type) {
+    case 'error-text':
+      return { state: 'output-error', errorText: output.value }
+    case 'error-json':
+      return { state: 'output-error', errorText: JSON.stringify(output.value) }
+    case 'execution-denied':
+      return { state: 'output-error', errorText: output.reason || 'Tool execution denied' }
+    default:
+      return { state: 'output-available', output: output.value }
+  }
+}
+
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
   const conversationId = getRouterParam(event, 'id')
   if (!conversationId)
     throw createError({ statusCode: 400, message: 'Conversation ID is required' })
 
-  const { messages } = await readBody<{ messages: UIMessage[] }>(event)
-  if (!messages?.length)
-    throw createError({ statusCode: 400, message: 'Messages are required' })
+  // Clients send only the new user message; history is rebuilt from the DB.
+  // A full `messages` array is still accepted, but only its last entry is used.
+  const body = await readBody<{ message?: UIMessage, messages?: UIMessage[] }>(event)
+  const lastMessage = body?.message ?? body?.messages?.[body.messages.length - 1]
+  if (lastMessage?.role !== 'user')
+    throw createError({ statusCode: 400, message: 'A user message is required' })
 
   const db = getDb()
 
@@ -30,24 +55,32 @@ export default defineEventHandler(async (event) => {
   if (!conversation)
     throw createError({ statusCode: 404, message: 'Conversation not found' })
 
-  // Load agent
-  const agent = await loadAgent(conversation.agentId, userId)
-
-  // Resolve model
-  const model = await resolveModelForAgent(conversation.agentId, userId)
-
-  // Save the new user message to DB
-  const lastMessage = messages[messages.length - 1]
-  if (lastMessage?.role === 'user') {
-    await db.insert(schema.messages).values({
+  // Load agent and resolve its model (independent, both cached)
+  const [agent, { model, providerId }] = await Promise.all([
+    timeStage('loadAgent', () => loadAgent(conversation.agentId, userId), event),
+    timeStage('resolveModel', () => resolveModelForAgent(conversation.agentId, userId), event)
+  ])
+
+  // Save the new user message while loading the prior history that fits the budget
+  const config = useRuntimeConfig()
+  const newMessageId = randomUUID()
+  const newContent = lastMessage.parts || [{ type: 'text', text: '' }]
+  const [, history] = await Promise.all([
+    timeStage('persist', () => db.insert(schema.messages).values({
+      id: newMessageId,
       conversationId,
       role: 'user',
-      content: lastMessage.parts || [{ type: 'text', text: '' }]
-    })
-  }
+      content: newContent
+    }), event),
+    timeStage('history', () => loadContextWindow(conversationId, {
+      tokenBudget: Math.max(0, Number(config.historyTokenBudget) - estimateTokens(JSON.stringify(newContent))),
+      maxMessages: Number(config.historyMaxMessages),
+      excludeId: newMessageId
+    }), event)
+  ])
 
   // Auto-title from first message
-  if (!conversation.title && lastMessage?.role === 'user') {
+  if (!conversation.title) {
     const textPart = lastMessage.parts?.find(
       (p: { type: string }) => p.type === 'text'
     ) as { type: 'text', text: string } | undefined
@@ -59,8 +92,43 @@ export default defineEventHandler(async (event) => {
     }
   }
 
+  // The agent prompt is the cacheable prefix; everything that varies per turn
+  // goes in turnContext after it so provider prompt caches keep hitting
+  const turnContext: string[] = []
+
+  // Retrieval mode: inject only the knowledge chunks relevant to this turn
+  let knowledgeTokens: number | undefined
+  let knowledgeTokensSaved: number | undefined
+
+  if (agent.knowledgeMode === 'retrieval' && agent.knowledge.files.length) {
+    const query = (lastMessage.parts || [])
+      .filter((p): p is { type: 'text', text: string } => p.type === 'text')
+      .map(p => p.text)
+      .join('\n')
+    const topK = Number(config.knowledgeTopK) || 5
+    const results = query ? agent.knowledge.search(query, topK) : []
+    const section = results.length
+      ? `## Relevant Knowledge\n\nExcerpts from your knowledge files that may help with this message. Use the searchKnowledge tool if you need more.\n\n${formatSearchResults(results)}`
+      : ''
+
+    turnContext.push(section)
+    knowledgeTokens = estimateTokens(section)
+    knowledgeTokensSaved = Math.max(0, estimateTokens(agent.knowledge.text) - knowledgeTokens)
+  }
+
+  // Older turns that no longer fit are represented by the rolling summary,
+  // which is updated after each response and so lags the window by one turn
+  if (history.trimmed && conversation.summary)
+    turnContext.push(`## Earlier in this conversation\n\n${conversation.summary}`)
+
   // Convert UIMessages to ModelMessages for streamText
-  const modelMessages = await convertToModelMessages(messages)
+  const messages = [...history.messages.map(dbMessageToUIMessage), lastMessage]
+  const modelMessages = [
+    ...buildSystemMessages(agent.systemPrompt, turnContext),
+    // Tool calls without a stored result (interrupted turns, older rows) would
+    // be rejected by providers, so leave them out of the replayed history
+    ...await convertToModelMessages(messages, { ignoreIncompleteToolCalls: true })
+  ]
 
   const modelId = typeof model === 'string' ? model : model.modelId
   const startTime = Date.now()
@@ -68,31 +136,37 @@ export default defineEventHandler(async (event) => {
   // Stream response
   const result = streamText({
     model,
-    system: agent.systemPrompt,
     messages: modelMessages,
-    tools: agent.tools,
+    tools: sortTools(agent.tools),
     stopWhen: stepCountIs(agent.maxSteps || 1),
-    onFinish: async ({ response, usage }) => {
+    providerOptions: promptCacheOptions(`${conversation.agentId || 'default'}:${userId}`),
+    onFinish: async ({ response, totalUsage: usage }) => {
       const durationMs = Date.now() - startTime
+      recordStage('stream', durationMs)
+      const persistStart = Date.now()
+      const cacheUsage = getCacheUsage(usage)
       const metadata: MessageMetadata = {
         model: modelId,
         inputTokens: usage.inputTokens || 0,
         outputTokens: usage.outputTokens || 0,
-        durationMs
+        durationMs,
+        knowledgeTokens,
+        knowledgeTokensSaved,
+        ...cacheUsage
       }
 
       // Merge all response messages into a single UIMessage-format parts array.
       // ModelMessages have tool-call/tool-result types; we convert them to
       // tool-{name} parts with state/output for proper UI rendering on reload.
       const uiParts: Record<string, unknown>[] = []
-      const toolResults = new Map<string, unknown>()
+      const toolResults = new Map<string, ToolResultPart['output']>()
 
       // First pass: collect tool results by toolCallId
       for (const msg of response.messages) {
         if (msg.role === 'tool' && Array.isArray(msg.content)) {
           for (const part of msg.content) {
             if (part.type === 'tool-result')
-              toolResults.set(part.toolCallId, part.result)
+              toolResults.set(part.toolCallId, part.output)
           }
         }
       }
@@ -109,9 +183,8 @@ export default defineEventHandler(async (event) => {
               type: `tool-${part.toolName}`,
               toolCallId: part.toolCallId,
               toolName: part.toolName,
-              args: part.args,
-              state: result !== undefined ? 'output-available' : 'input-available',
-              output: result
+              input: part.input,
+              ...(result ? toolResultState(result) : { state: 'input-available' })
             })
           }
         }
@@ -131,15 +204,22 @@ export default defineEventHandler(async (event) => {
       await db.update(schema.conversations)
         .set({ updatedAt: new Date() })
         .where(eq(schema.conversations.id, conversationId))
+      recordStage('persistReply', Date.now() - persistStart)
 
       // Log token usage
       logTokenUsage({
         userId,
+        providerId,
         modelId,
         source: 'chat',
         inputTokens: usage.inputTokens || 0,
-        outputTokens: usage.outputTokens || 0
+        outputTokens: usage.outputTokens || 0,
+        ...cacheUsage
       })
+
+      // Fold trimmed turns into the summary for the next request
+      if (history.trimmed)
+        updateRollingSummary(conversationId, history.messages[0]?.id ?? newMessageId, { model, providerId }, userId)
     }
   })
 
@@ -152,7 +232,10 @@ export default defineEventHandler(async (event) => {
           inputTokens: part.totalUsage.inputTokens || 0,
           outputTokens: part.totalUsage.outputTokens || 0,
           durationMs: Date.now() - startTime,
-          createdAt: new Date().toISOString()
+          createdAt: new Date().toISOString(),
+          knowledgeTokens,
+          knowledgeTokensSaved,
+          ...getCacheUsage(part.totalUsage)
         } satisfies MessageMetadata
       }
       return undefined
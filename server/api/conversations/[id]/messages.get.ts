@@ -0,0 +1,29 @@
+import { eq, and } from 'drizzle-orm'
+import { getDb, schema } from '~~/server/db'
+import { listMessagePage } from '~~/server/conversations/history'
+import { decodeCursor, parseLimit } from '~~/server/utils/pagination'
+
+export default defineEventHandler(async (event) => {
+  const userId = event.context.user.id
+  const id = getRouterParam(event, 'id')
+  if (!id)
+    throw createError({ statusCode: 400, message: 'Conversation ID is required' })
+
+  const query = getQuery(event)
+  const db = getDb()
+
+  const [conversation] = await db.select({ id: schema.conversations.id })
+    .from(schema.conversations)
+    .where(and(
+      eq(schema.conversations.id, id),
+      eq(schema.conversations.userId, userId)
+    ))
+    .limit(1)
+
+  if (!conversation)
+    throw createError({ statusCode: 404, message: 'Conversation not found' })
+
+  const { messages, nextCursor } = await listMessagePage(id, parseLimit(query.limit), decodeCursor(query.before))
+
+  return { data: messages, nextCursor }
+})
@@ -1,14 +1,33 @@
-import { eq, desc } from 'drizzle-orm'
+import { eq, and, desc, sql, getTableColumns } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import { decodeCursor, encodeCursor, parseLimit } from '~~/server/utils/pagination'
 
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
+  const query = getQuery(event)
+  const limit = parseLimit(query.limit)
+  const cursor = decodeCursor(query.cursor)
   const db = getDb()
 
-  const data = await db.select()
-    .from(schema.conversations)
-    .where(eq(schema.conversations.userId, userId))
-    .orderBy(desc(schema.conversations.updatedAt))
+  const c = schema.conversations
+  // The rolling summary can be large and the sidebar never shows it
+  const { summary: _summary, summaryThrough: _summaryThrough, ...columns } = getTableColumns(c)
+  const rows = await db.select({ ...columns, cursorTs: sql<string>`${c.updatedAt}::text` })
+    .from(c)
+    .where(and(
+      eq(c.userId, userId),
+      cursor ? sql`(${c.updatedAt}, ${c.id}) < (${cursor.ts}::timestamp, ${cursor.id}::uuid)` : undefined
+    ))
+    .orderBy(desc(c.updatedAt), desc(c.id))
+    .limit(limit + 1)
 
-  return { data }
+  const page = rows.slice(0, limit)
+  const last = page[page.length - 1]
+  const nextCursor = rows.length > limit && last
+    ? encodeCursor({ ts: last.cursorTs, id: last.id })
+    : null
+
+  const data = page.map(({ cursorTs: _, ...conversation }) => conversation)
+
+  return { data, nextCursor }
 })
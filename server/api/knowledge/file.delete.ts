@@ -15,7 +15,8 @@ export default defineEventHandler(async (event) => {
 
   await rm(targetPath, { recursive: true })
 
-  // Invalidate knowledge cache for the agent (first path segment)
+  // Invalidate knowledge cache for the agent (first path segment). The watcher
+  // normally picks this up; this covers platforms where watching is unavailable.
   const agentId = body.path.split('/')[0]
   if (agentId)
     getKnowledgeLoader().invalidate(agentId)
@@ -1,5 +1,6 @@
 import { mkdir, writeFile, stat } from 'fs/promises'
 import { validateKnowledgePath } from '~~/server/utils/knowledge-path'
+import { getKnowledgeLoader } from '~~/server/knowledge'
 
 export default defineEventHandler(async (event) => {
   const body = await readBody<{ path: string, type: 'file' | 'directory' }>(event)
@@ -19,5 +20,10 @@ export default defineEventHandler(async (event) => {
     await writeFile(targetPath, '', 'utf-8')
   }
 
+  // Fallback for when the watcher is unavailable — the watcher normally picks this up
+  const agentId = body.path.split('/')[0]
+  if (agentId)
+    getKnowledgeLoader().invalidate(agentId)
+
   return { data: { path: body.path, type: body.type || 'file' } }
 })
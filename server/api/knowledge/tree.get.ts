@@ -1,7 +1,7 @@
-import { resolveKnowledgeBase, buildKnowledgeFileTree } from '~~/server/utils/knowledge-path'
+import { getKnowledgeLoader } from '~~/server/knowledge'
+import { timeStage } from '~~/server/utils/metrics'
 
-export default defineEventHandler(async () => {
-  const base = resolveKnowledgeBase()
-  const files = await buildKnowledgeFileTree(base)
+export default defineEventHandler(async (event) => {
+  const files = await timeStage('knowledge', () => getKnowledgeLoader().getTree(), event)
   return { data: files }
 })
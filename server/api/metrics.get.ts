@@ -0,0 +1,8 @@
+import { getMetricsSnapshot, metricsEnabled } from '~~/server/utils/metrics'
+
+export default defineEventHandler(() => {
+  if (!metricsEnabled())
+    throw createError({ statusCode: 404, message: 'Metrics are disabled' })
+
+  return { data: getMetricsSnapshot() }
+})
@@ -1,5 +1,7 @@
 import { and, eq } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import { invalidateProviderClient } from '~~/server/ai/provider-factory'
+import { invalidateResolvedModels } from '~~/server/agents/resolve-model'
 
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
@@ -19,5 +21,8 @@ export default defineEventHandler(async (event) => {
 
   await db.delete(schema.providers).where(eq(schema.providers.id, id))
 
+  invalidateProviderClient(id)
+  invalidateResolvedModels({ userId })
+
   return { data: { success: true } }
 })
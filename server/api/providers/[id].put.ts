@@ -1,5 +1,7 @@
 import { and, eq } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import { invalidateProviderClient } from '~~/server/ai/provider-factory'
+import { invalidateResolvedModels } from '~~/server/agents/resolve-model'
 import { encryptProviderConfig, decryptProviderConfig } from '~~/server/utils/provider-config'
 
 const MASK = '••••••••'
@@ -45,5 +47,8 @@ export default defineEventHandler(async (event) => {
     .where(eq(schema.providers.id, id))
     .returning()
 
+  invalidateProviderClient(id)
+  invalidateResolvedModels({ userId })
+
   return { data: updated }
 })
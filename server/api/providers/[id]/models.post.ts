@@ -1,5 +1,6 @@
 import { and, eq } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import { invalidateResolvedModels } from '~~/server/agents/resolve-model'
 
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
@@ -36,5 +37,8 @@ export default defineEventHandler(async (event) => {
     })
     .returning()
 
+  // A new model can change which model a tag preference resolves to
+  invalidateResolvedModels({ userId })
+
   return { data: model }
 })
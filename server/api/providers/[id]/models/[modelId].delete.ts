@@ -1,5 +1,6 @@
 import { and, eq } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import { invalidateResolvedModels } from '~~/server/agents/resolve-model'
 
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
@@ -29,5 +30,7 @@ export default defineEventHandler(async (event) => {
 
   await db.delete(schema.models).where(eq(schema.models.id, modelId))
 
+  invalidateResolvedModels({ userId })
+
   return { data: { success: true } }
 })
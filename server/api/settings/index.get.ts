@@ -1,10 +1,17 @@
+import { inArray } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
 
+// The keys the PUT handler accepts; other rows (e.g. the usage rollup
+// backfill marker) are internal bookkeeping
+const PUBLIC_KEYS = ['appName', 'defaultModelId']
+
 export default defineEventHandler(async () => {
   const config = useRuntimeConfig()
   const db = getDb()
 
-  const rows = await db.select().from(schema.appSettings)
+  const rows = await db.select()
+    .from(schema.appSettings)
+    .where(inArray(schema.appSettings.key, PUBLIC_KEYS))
   const settings: Record<string, unknown> = {}
   for (const row of rows)
     settings[row.key] = row.value
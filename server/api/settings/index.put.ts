@@ -1,4 +1,5 @@
 import { getDb, schema } from '~~/server/db'
+import { invalidateResolvedModels } from '~~/server/agents/resolve-model'
 
 const ALLOWED_KEYS = ['appName', 'defaultModelId']
 
@@ -17,5 +18,9 @@ export default defineEventHandler(async (event) => {
     }
   }
 
+  // defaultModelId is global and overrides agent tag preferences for every user
+  if ('defaultModelId' in body)
+    invalidateResolvedModels()
+
   return { data: body }
 })
@@ -1,5 +1,26 @@
-import { eq } from 'drizzle-orm'
+import { and, eq, gt, gte, lt, sql } from 'drizzle-orm'
 import { getDb, schema } from '~~/server/db'
+import type { UsageBreakdown, DailyUsage } from '~~/shared/types'
+
+interface UsageSums {
+  cost: number
+  inputTokens: number
+  outputTokens: number
+  calls: number
+}
+
+function addSums(target: UsageSums, row: UsageSums): void {
+  target.cost += row.cost
+  target.inputTokens += row.inputTokens
+  target.outputTokens += row.outputTokens
+  target.calls += row.calls
+}
+
+function toBreakdown(map: Map<string, UsageSums>): UsageBreakdown[] {
+  return Array.from(map.entries())
+    .map(([key, sums]) => ({ key, ...sums }))
+    .sort((a, b) => b.cost - a.cost || b.calls - a.calls)
+}
 
 export default defineEventHandler(async (event) => {
   const userId = event.context.user.id
@@ -7,6 +28,8 @@ export default defineEventHandler(async (event) => {
   const period = (query.period as string) || '7d'
 
   const db = getDb()
+  const daily = schema.tokenUsageDaily
+  const usage = schema.tokenUsage
 
   const periodMap: Record<string, number> = {
     '24h': 1,
@@ -17,42 +40,105 @@ export default defineEventHandler(async (event) => {
   const since = new Date()
   since.setDate(since.getDate() - days)
 
-  const rows = await db.select()
-    .from(schema.tokenUsage)
-    .where(
-      eq(schema.tokenUsage.userId, userId)
-    )
-
-  const filtered = rows.filter(r => new Date(r.createdAt) >= since)
-
-  const totalCost = filtered.reduce((sum, r) => sum + (r.cost || 0), 0)
-  const totalInputTokens = filtered.reduce((sum, r) => sum + r.inputTokens, 0)
-  const totalOutputTokens = filtered.reduce((sum, r) => sum + r.outputTokens, 0)
-  const totalCalls = filtered.length
-
-  // Group by date
-  const dailyMap = new Map<string, { cost: number, inputTokens: number, outputTokens: number, calls: number }>()
-  for (const row of filtered) {
-    const date = new Date(row.createdAt).toISOString().split('T')[0]!
-    const existing = dailyMap.get(date) || { cost: 0, inputTokens: 0, outputTokens: 0, calls: 0 }
-    existing.cost += row.cost || 0
-    existing.inputTokens += row.inputTokens
-    existing.outputTokens += row.outputTokens
-    existing.calls += 1
-    dailyMap.set(date, existing)
+  // Whole days after `since` come from the daily rollup; the partial first
+  // day is aggregated from raw rows via the (user_id, created_at) index.
+  // created_at holds UTC wall time and rollup days are UTC dates, so the
+  // boundaries are computed in UTC and bound through the column encoders.
+  const sinceDay = since.toISOString().slice(0, 10)
+  const dayAfterSince = new Date(`${sinceDay}T00:00:00.000Z`)
+  dayAfterSince.setUTCDate(dayAfterSince.getUTCDate() + 1)
+
+  const [dailyRows, comboRows, partialRows] = await Promise.all([
+    db.select({
+      date: sql<string>`to_char(${daily.day}, 'YYYY-MM-DD')`,
+      cost: sql<number>`sum(${daily.cost})`.mapWith(Number),
+      inputTokens: sql<number>`sum(${daily.inputTokens})`.mapWith(Number),
+      outputTokens: sql<number>`sum(${daily.outputTokens})`.mapWith(Number),
+      calls: sql<number>`sum(${daily.calls})`.mapWith(Number)
+    })
+      .from(daily)
+      .where(and(eq(daily.userId, userId), gt(daily.day, sinceDay)))
+      .groupBy(daily.day),
+
+    db.select({
+      modelId: daily.modelId,
+      providerId: daily.providerId,
+      source: daily.source,
+      cost: sql<number>`sum(${daily.cost})`.mapWith(Number),
+      inputTokens: sql<number>`sum(${daily.inputTokens})`.mapWith(Number),
+      outputTokens: sql<number>`sum(${daily.outputTokens})`.mapWith(Number),
+      cacheReadTokens: sql<number>`sum(${daily.cacheReadTokens})`.mapWith(Number),
+      cacheWriteTokens: sql<number>`sum(${daily.cacheWriteTokens})`.mapWith(Number),
+      calls: sql<number>`sum(${daily.calls})`.mapWith(Number)
+    })
+      .from(daily)
+      .where(and(eq(daily.userId, userId), gt(daily.day, sinceDay)))
+      .groupBy(daily.modelId, daily.providerId, daily.source),
+
+    db.select({
+      modelId: sql<string>`coalesce(${usage.modelId}, '')`,
+      providerId: sql<string>`coalesce(${usage.providerId}::text, '')`,
+      source: usage.source,
+      cost: sql<number>`coalesce(sum(${usage.cost}), 0)`.mapWith(Number),
+      inputTokens: sql<number>`sum(${usage.inputTokens})`.mapWith(Number),
+      outputTokens: sql<number>`sum(${usage.outputTokens})`.mapWith(Number),
+      cacheReadTokens: sql<number>`sum(${usage.cacheReadTokens})`.mapWith(Number),
+      cacheWriteTokens: sql<number>`sum(${usage.cacheWriteTokens})`.mapWith(Number),
+      calls: sql<number>`count(*)`.mapWith(Number)
+    })
+      .from(usage)
+      .where(and(
+        eq(usage.userId, userId),
+        gte(usage.createdAt, since),
+        lt(usage.createdAt, dayAfterSince)
+      ))
+      .groupBy(usage.modelId, usage.providerId, usage.source)
+  ])
+
+  const totals: UsageSums = { cost: 0, inputTokens: 0, outputTokens: 0, calls: 0 }
+  const byModel = new Map<string, UsageSums>()
+  const byProvider = new Map<string, UsageSums>()
+  const bySource = new Map<string, UsageSums>()
+  let cacheReadTokens = 0
+  let cacheWriteTokens = 0
+
+  for (const row of [...comboRows, ...partialRows]) {
+    addSums(totals, row)
+    cacheReadTokens += row.cacheReadTokens
+    cacheWriteTokens += row.cacheWriteTokens
+    const keys: Array<[Map<string, UsageSums>, string]> = [
+      [byModel, row.modelId || 'unknown'],
+      [byProvider, row.providerId || 'unknown'],
+      [bySource, row.source]
+    ]
+    for (const [map, key] of keys) {
+      const existing = map.get(key) || { cost: 0, inputTokens: 0, outputTokens: 0, calls: 0 }
+      addSums(existing, row)
+      map.set(key, existing)
+    }
   }
 
-  const dailyBreakdown = Array.from(dailyMap.entries())
-    .map(([date, stats]) => ({ date, ...stats }))
-    .sort((a, b) => a.date.localeCompare(b.date))
+  const dailyBreakdown: DailyUsage[] = dailyRows.map(row => ({ ...row }))
+  if (partialRows.length) {
+    const partial: DailyUsage = { date: sinceDay, cost: 0, inputTokens: 0, outputTokens: 0, calls: 0 }
+    for (const row of partialRows)
+      addSums(partial, row)
+    dailyBreakdown.push(partial)
+  }
+  dailyBreakdown.sort((a, b) => a.date.localeCompare(b.date))
 
   return {
     data: {
-      totalCost,
-      totalInputTokens,
-      totalOutputTokens,
-      totalCalls,
-      dailyBreakdown
+      totalCost: totals.cost,
+      totalInputTokens: totals.inputTokens,
+      totalOutputTokens: totals.outputTokens,
+      totalCacheReadTokens: cacheReadTokens,
+      totalCacheWriteTokens: cacheWriteTokens,
+      totalCalls: totals.calls,
+      dailyBreakdown,
+      byModel: toBreakdown(byModel),
+      byProvider: toBreakdown(byProvider),
+      bySource: toBreakdown(bySource)
     }
   }
 })
@@ -0,0 +1,204 @@
+import { generateText } from 'ai'
+import { and, asc, desc, eq, gt, lt, ne, sql, getTableColumns, type SQL } from 'drizzle-orm'
+import { getDb, schema } from '~~/server/db'
+import { estimateTokens } from '~~/server/ai/tokens'
+import { logTokenUsage } from '~~/server/ai/usage'
+import type { ResolvedModel } from '~~/server/ai/get-model'
+import { encodeCursor, type PageCursor } from '~~/server/utils/pagination'
+import type { Message } from '~~/shared/types'
+
+const SUMMARY_BATCH_SIZE = 100
+const SUMMARY_MAX_OUTPUT_TOKENS = 1024
+
+export interface MessagePage {
+  messages: Message[]
+  nextCursor: string | null
+}
+
+export interface ContextWindow {
+  messages: Message[]
+  // True when older messages were left out to fit the budget
+  trimmed: boolean
+  tokens: number
+}
+
+/**
+ * One page of messages, newest first in the query and returned oldest first.
+ * `nextCursor` points at the next (older) page, or null at the start.
+ */
+export async function listMessagePage(
+  conversationId: string,
+  limit: number,
+  before: PageCursor | null
+): Promise<MessagePage> {
+  const m = schema.messages
+  const rows = await getDb().select({ ...getTableColumns(m), cursorTs: sql<string>`${m.createdAt}::text` })
+    .from(m)
+    .where(and(
+      eq(m.conversationId, conversationId),
+      before ? sql`(${m.createdAt}, ${m.id}) < (${before.ts}::timestamp, ${before.id}::uuid)` : undefined
+    ))
+    .orderBy(desc(m.createdAt), desc(m.id))
+    .limit(limit + 1)
+
+  const page = rows.slice(0, limit)
+  const oldest = page[page.length - 1]
+  const nextCursor = rows.length > limit && oldest
+    ? encodeCursor({ ts: oldest.cursorTs, id: oldest.id })
+    : null
+
+  return {
+    messages: page.reverse().map(({ cursorTs: _, ...message }) => message),
+    nextCursor
+  }
+}
+
+/**
+ * Load the most recent messages that fit in `tokenBudget` (and at most
+ * `maxMessages`). When trimmed, the window starts on a user turn so the
+ * model never sees an assistant reply without its prompt.
+ */
+export async function loadContextWindow(
+  conversationId: string,
+  options: { tokenBudget: number, maxMessages: number, excludeId?: string }
+): Promise<ContextWindow> {
+  const m = schema.messages
+  const rows = await getDb().select()
+    .from(m)
+    .where(and(
+      eq(m.conversationId, conversationId),
+      options.excludeId ? ne(m.id, options.excludeId) : undefined
+    ))
+    .orderBy(desc(m.createdAt), desc(m.id))
+    .limit(options.maxMessages + 1)
+
+  const kept: Message[] = []
+  let tokens = 0
+  for (const row of rows) {
+    const rowTokens = estimateTokens(JSON.stringify(row.content))
+    if (kept.length >= options.maxMessages || tokens + rowTokens > options.tokenBudget)
+      break
+    kept.push(row)
+    tokens += rowTokens
+  }
+
+  const trimmed = kept.length < rows.length
+  kept.reverse()
+
+  if (trimmed) {
+    while (kept.length && kept[0]!.role !== 'user')
+      tokens -= estimateTokens(JSON.stringify(kept.shift()!.content))
+  }
+
+  return { messages: kept, trimmed, tokens }
+}
+
+function messageText(message: Message): string {
+  const content = message.content as unknown
+  if (typeof content === 'string')
+    return content
+  if (!Array.isArray(content))
+    return ''
+  return content
+    .map((part: { type?: string, text?: string, toolName?: string }) => {
+      if (part.type === 'text')
+        return part.text || ''
+      if (part.type?.startsWith('tool-'))
+        return `[used tool ${part.toolName || part.type.slice(5)}]`
+      return ''
+    })
+    .filter(Boolean)
+    .join('\n')
+}
+
+const summarizing = new Set<string>()
+
+/**
+ * Fold messages older than `keptFromId` that are not yet in the conversation's
+ * rolling summary into it, in batches until the summary reaches the window.
+ * Runs after the response, off the request path, so the summary lags by one
+ * turn: messages trimmed from this turn's window show up in it next turn.
+ * One update per conversation at a time.
+ */
+export async function updateRollingSummary(
+  conversationId: string,
+  keptFromId: string,
+  { model, providerId }: ResolvedModel,
+  userId: string
+): Promise<void> {
+  if (summarizing.has(conversationId))
+    return
+  summarizing.add(conversationId)
+
+  try {
+    const db = getDb()
+    const m = schema.messages
+    const c = schema.conversations
+
+    const [conversation] = await db.select({ summary: c.summary, summaryThrough: c.summaryThrough })
+      .from(c)
+      .where(eq(c.id, conversationId))
+      .limit(1)
+    if (!conversation)
+      return
+
+    let summary = conversation.summary
+    let hasSummary = Boolean(conversation.summaryThrough)
+
+    while (true) {
+      const conditions: SQL[] = [
+        eq(m.conversationId, conversationId),
+        lt(m.createdAt, sql`(select ${m.createdAt} from ${m} where ${m.id} = ${keptFromId})`)
+      ]
+      if (hasSummary)
+        conditions.push(gt(m.createdAt, sql`(select ${c.summaryThrough} from ${c} where ${c.id} = ${conversationId})`))
+
+      const rows = await db.select()
+        .from(m)
+        .where(and(...conditions))
+        .orderBy(asc(m.createdAt), asc(m.id))
+        .limit(SUMMARY_BATCH_SIZE)
+
+      const last = rows[rows.length - 1]
+      if (!last)
+        return
+
+      const transcript = rows
+        .map(r => `${r.role}: ${messageText(r)}`)
+        .join('\n\n')
+
+      const { text, usage } = await generateText({
+        model,
+        system: 'You maintain a concise running summary of a conversation between a user and an AI assistant. Preserve facts, decisions, names, open questions and user preferences. Write in plain prose, no preamble.',
+        prompt: `Current summary:\n${summary || '(none)'}\n\nNew messages to fold in:\n\n${transcript}\n\nReturn the updated summary.`,
+        maxOutputTokens: SUMMARY_MAX_OUTPUT_TOKENS
+      })
+
+      await db.update(c)
+        .set({
+          summary: text,
+          summaryThrough: sql`(select ${m.createdAt} from ${m} where ${m.id} = ${last.id})`
+        })
+        .where(eq(c.id, conversationId))
+      summary = text
+      hasSummary = true
+
+      logTokenUsage({
+        userId,
+        providerId,
+        modelId: typeof model === 'string' ? model : model.modelId,
+        source: 'chat',
+        inputTokens: usage.inputTokens || 0,
+        outputTokens: usage.outputTokens || 0
+      })
+
+      // A short batch means the summary has caught up with the window
+      if (rows.length < SUMMARY_BATCH_SIZE)
+        return
+    }
+  } catch (error) {
+    console.error(`[chat] Failed to update summary for ${conversationId}:`, error)
+  } finally {
+    summarizing.delete(conversationId)
+  }
+}
@@ -0,0 +1,174 @@
+import { generateText, stepCountIs } from 'ai'
+import { eq } from 'drizzle-orm'
+import { getDb, schema } from '~~/server/db'
+import { loadAgent } from '~~/server/agents/loader'
+import { resolveModelForAgent } from '~~/server/agents/resolve-model'
+import { estimateCost } from '~~/server/ai/cost'
+import { getCacheUsage, logTokenUsage } from '~~/server/ai/usage'
+import { CronRunStatus } from '~~/shared/types'
+
+// Used when neither the cron agent nor the agent sets a turn limit
+const DEFAULT_MAX_TURNS = 10
+
+export interface CronJob {
+  runId: string
+  cronAgentId: string
+  userId: string
+  agentId: string
+  prompt: string
+  maxTurns: number | null
+  maxBudget: number | null
+  scheduledFor: Date
+}
+
+export interface CronRunOutcome {
+  status: typeof CronRunStatus[keyof typeof CronRunStatus]
+  turns: number
+  tokensUsed: number
+  cost: number
+  durationMs: number
+}
+
+export interface CronRunOptions {
+  // Aborts the run from outside: shutdown, cancellation or timeout
+  signal: AbortSignal
+  // Wait for the provider's rate limit before each model call
+  acquire: (provider: string, signal: AbortSignal) => Promise<void>
+}
+
+/**
+ * Execute one claimed run and record its outcome on the cron_agent_runs row.
+ *
+ * Limits are checked after every step: crossing maxBudget, or wanting another
+ * tool round after maxTurns, aborts the generation through the run's
+ * AbortController. Output produced up to that point is kept.
+ */
+export async function executeCronRun(job: CronJob, options: CronRunOptions): Promise<CronRunOutcome> {
+  const db = getDb()
+  const startTime = Date.now()
+  const controller = new AbortController()
+  const forwardAbort = () => controller.abort(options.signal.reason)
+  options.signal.addEventListener('abort', forwardAbort, { once: true })
+
+  const texts: string[] = []
+  let turns = 0
+  let inputTokens = 0
+  let outputTokens = 0
+  let cacheReadTokens = 0
+  let cacheWriteTokens = 0
+  let cost = 0
+  let modelId: string | null = null
+  let providerId: string | undefined
+  // Set from onStepFinish; cast so TS doesn't narrow it to null after the call
+  let stopReason = null as 'budget' | 'turns' | null
+  let status: CronRunOutcome['status'] = CronRunStatus.SUCCESS
+  let errorMessage: string | null = null
+
+  try {
+    const agent = await loadAgent(job.agentId, job.userId)
+    const { model, providerId: resolvedProviderId } = await resolveModelForAgent(job.agentId, job.userId)
+    const currentModelId = typeof model === 'string' ? model : model.modelId
+    // Rate limits apply per configured provider, so two OpenAI-compatible
+    // providers get separate buckets
+    const provider = resolvedProviderId || (typeof model === 'string' ? model.split('/')[0]! : model.provider)
+    const maxTurns = job.maxTurns || agent.maxSteps || DEFAULT_MAX_TURNS
+    modelId = currentModelId
+    providerId = resolvedProviderId
+
+    await generateText({
+      model,
+      system: agent.systemPrompt,
+      prompt: job.prompt,
+      tools: agent.tools,
+      // Backstop only — the limits below stop the run first
+      stopWhen: stepCountIs(maxTurns),
+      abortSignal: controller.signal,
+      prepareStep: async () => {
+        await options.acquire(provider, controller.signal)
+        return undefined
+      },
+      onStepFinish: (step) => {
+        turns++
+        if (step.text)
+          texts.push(step.text)
+
+        const cache = getCacheUsage(step.usage)
+        inputTokens += step.usage.inputTokens || 0
+        outputTokens += step.usage.outputTokens || 0
+        cacheReadTokens += cache.cacheReadTokens
+        cacheWriteTokens += cache.cacheWriteTokens
+        cost = estimateCost(currentModelId, inputTokens, outputTokens, { cacheReadTokens, cacheWriteTokens })
+
+        if (job.maxBudget != null && cost >= job.maxBudget) {
+          stopReason = 'budget'
+          controller.abort()
+        } else if (turns >= maxTurns && step.finishReason === 'tool-calls') {
+          stopReason = 'turns'
+          controller.abort()
+        }
+
+        // Progress for anyone watching the run; the final update follows
+        db.update(schema.cronAgentRuns)
+          .set({ turns, tokensUsed: inputTokens + outputTokens, cost })
+          .where(eq(schema.cronAgentRuns.id, job.runId))
+          .catch(() => {})
+      }
+    })
+  } catch (error) {
+    if (!stopReason) {
+      const reason = options.signal.reason as { name?: string } | undefined
+      if (options.signal.aborted && reason?.name === 'TimeoutError') {
+        status = CronRunStatus.ERROR
+        errorMessage = 'Run timed out'
+      } else if (options.signal.aborted) {
+        status = CronRunStatus.CANCELLED
+      } else {
+        status = CronRunStatus.ERROR
+        errorMessage = error instanceof Error ? error.message : String(error)
+      }
+    }
+  } finally {
+    options.signal.removeEventListener('abort', forwardAbort)
+  }
+
+  if (stopReason === 'budget')
+    status = CronRunStatus.BUDGET_EXCEEDED
+
+  let result = texts.join('\n\n')
+  if (stopReason === 'turns')
+    result += `\n\n[Stopped after ${turns} turns]`
+  if (errorMessage)
+    result = result ? `${result}\n\n[Error: ${errorMessage}]` : errorMessage
+
+  if (modelId && (inputTokens || outputTokens)) {
+    logTokenUsage({
+      userId: job.userId,
+      providerId,
+      modelId,
+      source: 'cron',
+      inputTokens,
+      outputTokens,
+      cacheReadTokens,
+      cacheWriteTokens
+    })
+  }
+
+  await db.update(schema.cronAgentRuns)
+    .set({
+      status,
+      result: result.trim() || null,
+      turns,
+      tokensUsed: inputTokens + outputTokens,
+      cost,
+      completedAt: new Date()
+    })
+    .where(eq(schema.cronAgentRuns.id, job.runId))
+
+  return {
+    status,
+    turns,
+    tokensUsed: inputTokens + outputTokens,
+    cost,
+    durationMs: Date.now() - startTime
+  }
+}
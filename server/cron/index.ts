@@ -0,0 +1,25 @@
+import { CronScheduler } from './scheduler'
+
+let _scheduler: CronScheduler | null = null
+
+export function getCronScheduler(): CronScheduler {
+  if (!_scheduler) {
+    const config = useRuntimeConfig()
+    _scheduler = new CronScheduler({
+      concurrency: Math.max(1, Number(config.cronConcurrency)),
+      pollIntervalMs: Number(config.cronPollIntervalMs),
+      providerRpm: Math.max(1, Number(config.cronProviderRpm)),
+      providerBurst: Math.max(1, Number(config.cronProviderBurst)),
+      runTimeoutMs: Number(config.cronRunTimeoutMs)
+    })
+  }
+  return _scheduler
+}
+
+/**
+ * Stop the scheduler if it was started. Called before the DB pool closes so
+ * cancelled runs can still record their status.
+ */
+export async function stopCronScheduler(): Promise<void> {
+  await _scheduler?.stop()
+}
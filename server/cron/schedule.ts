@@ -0,0 +1,142 @@
+// Standard 5-field cron expressions: minute hour day-of-month month day-of-week.
+// Supports `*`, lists, ranges, steps, month/day names and @-aliases.
+// Evaluated in the server's local time zone.
+
+export interface CronSchedule {
+  minutes: Set<number>
+  hours: Set<number>
+  days: Set<number>
+  months: Set<number>
+  weekdays: Set<number>
+  // Per cron semantics, when both day fields are restricted either may match
+  daysRestricted: boolean
+  weekdaysRestricted: boolean
+}
+
+const ALIASES: Record<string, string> = {
+  '@yearly': '0 0 1 1 *',
+  '@annually': '0 0 1 1 *',
+  '@monthly': '0 0 1 * *',
+  '@weekly': '0 0 * * 0',
+  '@daily': '0 0 * * *',
+  '@midnight': '0 0 * * *',
+  '@hourly': '0 * * * *'
+}
+
+const MONTH_NAMES = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+const DAY_NAMES = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+// Search horizon for nextRun(); covers Feb 29 and day/weekday combinations
+const MAX_SEARCH_YEARS = 5
+
+function parseValue(value: string, names?: string[], offset = 0): number {
+  const named = names?.indexOf(value.toLowerCase()) ?? -1
+  if (named >= 0)
+    return named + offset
+  if (!/^\d+$/.test(value))
+    throw new Error(`Invalid value "${value}"`)
+  return Number(value)
+}
+
+function parseField(field: string, min: number, max: number, names?: string[], offset = 0): Set<number> {
+  const values = new Set<number>()
+
+  for (const part of field.split(',')) {
+    const [range, stepText] = part.split('/')
+    const step = stepText === undefined ? 1 : Number(stepText)
+    if (!range || !Number.isInteger(step) || step < 1)
+      throw new Error(`Invalid step in "${part}"`)
+
+    let start: number
+    let end: number
+    if (range === '*') {
+      start = min
+      end = max
+    } else if (range.includes('-')) {
+      const [from, to] = range.split('-')
+      start = parseValue(from!, names, offset)
+      end = parseValue(to!, names, offset)
+    } else {
+      start = parseValue(range, names, offset)
+      end = stepText === undefined ? start : max
+    }
+
+    if (start < min || end > max || start > end)
+      throw new Error(`Value out of range in "${part}" (${min}-${max})`)
+
+    for (let v = start; v <= end; v += step)
+      values.add(v)
+  }
+
+  return values
+}
+
+/**
+ * Parse a cron expression. Throws with a descriptive message when invalid.
+ */
+export function parseSchedule(expression: string): CronSchedule {
+  const normalized = ALIASES[expression.trim().toLowerCase()] ?? expression.trim()
+  const fields = normalized.split(/\s+/)
+  if (fields.length !== 5)
+    throw new Error(`Expected 5 fields, got ${fields.length}`)
+
+  const [minute, hour, day, month, weekday] = fields as [string, string, string, string, string]
+  const weekdays = parseField(weekday, 0, 7, DAY_NAMES)
+  // 7 is an alias for Sunday
+  if (weekdays.delete(7))
+    weekdays.add(0)
+
+  return {
+    minutes: parseField(minute, 0, 59),
+    hours: parseField(hour, 0, 23),
+    days: parseField(day, 1, 31),
+    months: parseField(month, 1, 12, MONTH_NAMES, 1),
+    weekdays,
+    daysRestricted: day !== '*',
+    weekdaysRestricted: weekday !== '*'
+  }
+}
+
+function matchesDay(schedule: CronSchedule, date: Date): boolean {
+  const dayMatch = schedule.days.has(date.getDate())
+  const weekdayMatch = schedule.weekdays.has(date.getDay())
+  if (schedule.daysRestricted && schedule.weekdaysRestricted)
+    return dayMatch || weekdayMatch
+  return dayMatch && weekdayMatch
+}
+
+/**
+ * The first time strictly after `after` that matches the schedule.
+ * Returns null when nothing matches within the search horizon (e.g. "0 0 31 2 *").
+ */
+export function nextRun(schedule: CronSchedule | string, after: Date): Date | null {
+  const s = typeof schedule === 'string' ? parseSchedule(schedule) : schedule
+  const date = new Date(after)
+  date.setSeconds(0, 0)
+  date.setMinutes(date.getMinutes() + 1)
+
+  const limit = after.getFullYear() + MAX_SEARCH_YEARS
+  while (date.getFullYear() <= limit) {
+    if (!s.months.has(date.getMonth() + 1)) {
+      date.setMonth(date.getMonth() + 1, 1)
+      date.setHours(0, 0, 0, 0)
+      continue
+    }
+    if (!matchesDay(s, date)) {
+      date.setDate(date.getDate() + 1)
+      date.setHours(0, 0, 0, 0)
+      continue
+    }
+    if (!s.hours.has(date.getHours())) {
+      date.setHours(date.getHours() + 1, 0, 0, 0)
+      continue
+    }
+    if (!s.minutes.has(date.getMinutes())) {
+      date.setMinutes(date.getMinutes() + 1, 0, 0)
+      continue
+    }
+    return date
+  }
+
+  return null
+}
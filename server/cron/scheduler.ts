@@ -0,0 +1,274 @@
+import { hostname } from 'os'
+import { randomUUID } from 'crypto'
+import { and, asc, eq, isNull, lt, lte } from 'drizzle-orm'
+import { getDb, schema } from '~~/server/db'
+import { TokenBucket } from '~~/server/utils/token-bucket'
+import { CronRunStatus } from '~~/shared/types'
+import { nextRun } from './schedule'
+import { executeCronRun, type CronJob, type CronRunOutcome } from './executor'
+
+export interface CronSchedulerOptions {
+  concurrency: number
+  pollIntervalMs: number
+  // Per-provider limit on model calls made by cron runs
+  providerRpm: number
+  providerBurst: number
+  runTimeoutMs: number
+}
+
+export interface CronStats {
+  nodeId: string
+  running: boolean
+  concurrency: number
+  activeRuns: number
+  // Runs per outcome since startup
+  completed: Record<string, number>
+  runsPerMinute: number
+  // Delay between a run being due and starting, over recent runs
+  lagMs: { last: number, avg: number, max: number }
+  avgDurationMs: number
+  // Calls waiting on a provider rate limit, keyed by provider id
+  rateLimited: Record<string, number>
+}
+
+// Window for the throughput and lag figures
+const RECENT_WINDOW_MS = 15 * 60 * 1000
+// Extra time before a run left 'running' by a dead node is reaped
+const REAP_GRACE_MS = 60 * 1000
+
+interface RecentRun {
+  finishedAt: number
+  lagMs: number
+  durationMs: number
+}
+
+/**
+ * Claims due cron runs from Postgres and executes them on a bounded pool.
+ *
+ * Claiming locks due cron_agents rows with FOR UPDATE SKIP LOCKED, advances
+ * their next_run_at and inserts the run rows in one transaction, so several
+ * nodes can poll the same table without running a job twice. Each node only
+ * claims as many runs as it has free workers; the rest stay queued in the table.
+ */
+export class CronScheduler {
+  readonly nodeId = `${hostname()}:${process.pid}:${randomUUID().slice(0, 8)}`
+  private timer: ReturnType<typeof setInterval> | null = null
+  private ticking: Promise<void> | null = null
+  private active = new Map<string, AbortController>()
+  private tasks = new Set<Promise<void>>()
+  private buckets = new Map<string, TokenBucket>()
+  private completed: Record<string, number> = {}
+  private recent: RecentRun[] = []
+  private lastLagMs = 0
+
+  constructor(private readonly options: CronSchedulerOptions) {}
+
+  start(): void {
+    if (this.timer)
+      return
+    this.timer = setInterval(() => this.tick(), this.options.pollIntervalMs)
+    this.timer.unref()
+    this.tick()
+  }
+
+  /**
+   * Stop claiming, cancel in-flight runs and wait for them to record their status.
+   */
+  async stop(): Promise<void> {
+    if (this.timer)
+      clearInterval(this.timer)
+    this.timer = null
+    await this.ticking
+    for (const controller of this.active.values())
+      controller.abort(new Error('Scheduler stopped'))
+    await Promise.allSettled(this.tasks)
+  }
+
+  /**
+   * One poll: reap abandoned runs, schedule new cron agents, claim due runs.
+   * Overlapping calls share the in-flight tick.
+   */
+  tick(): Promise<void> {
+    if (!this.ticking) {
+      this.ticking = this.poll()
+        .catch(error => console.error('[cron] Scheduler tick failed:', error))
+        .finally(() => {
+          this.ticking = null
+        })
+    }
+    return this.ticking
+  }
+
+  private async poll(): Promise<void> {
+    await this.reapAbandoned()
+    await this.scheduleNew()
+
+    const free = this.options.concurrency - this.active.size
+    if (free <= 0 || !this.timer)
+      return
+
+    for (const job of await this.claim(free))
+      this.dispatch(job)
+  }
+
+  private async claim(limit: number): Promise<CronJob[]> {
+    const c = schema.cronAgents
+    return getDb().transaction(async (tx) => {
+      // next_run_at holds UTC wall time; a bound Date is encoded the same way,
+      // unlike now(), which depends on the session TimeZone
+      const due = await tx.select()
+        .from(c)
+        .where(and(eq(c.enabled, true), lte(c.nextRunAt, new Date())))
+        .orderBy(asc(c.nextRunAt))
+        .limit(limit)
+        .for('update', { skipLocked: true })
+
+      const now = new Date()
+      const jobs: CronJob[] = []
+      for (const cronAgent of due) {
+        // Missed runs (e.g. while the server was down) collapse into this one
+        const next = this.computeNext(cronAgent.schedule, now)
+        await tx.update(c)
+          .set({ nextRunAt: next, lastRunAt: now, enabled: next !== null })
+          .where(eq(c.id, cronAgent.id))
+
+        const [run] = await tx.insert(schema.cronAgentRuns)
+          .values({
+            cronAgentId: cronAgent.id,
+            status: CronRunStatus.RUNNING,
+            scheduledFor: cronAgent.nextRunAt,
+            claimedBy: this.nodeId,
+            startedAt: now
+          })
+          .returning({ id: schema.cronAgentRuns.id })
+
+        jobs.push({
+          runId: run!.id,
+          cronAgentId: cronAgent.id,
+          userId: cronAgent.userId,
+          agentId: cronAgent.agentId,
+          prompt: cronAgent.prompt,
+          maxTurns: cronAgent.maxTurns,
+          maxBudget: cronAgent.maxBudget,
+          scheduledFor: cronAgent.nextRunAt!
+        })
+      }
+      return jobs
+    })
+  }
+
+  private dispatch(job: CronJob): void {
+    const controller = new AbortController()
+    const signal = AbortSignal.any([controller.signal, AbortSignal.timeout(this.options.runTimeoutMs)])
+    const lagMs = Math.max(0, Date.now() - job.scheduledFor.getTime())
+    this.lastLagMs = lagMs
+    this.active.set(job.runId, controller)
+
+    const task = executeCronRun(job, {
+      signal,
+      acquire: (provider, runSignal) => this.bucket(provider).take(runSignal)
+    })
+      .then(outcome => this.record(outcome, lagMs))
+      .catch(error => console.error(`[cron] Run ${job.runId} failed to complete:`, error))
+      .finally(() => {
+        this.active.delete(job.runId)
+        this.tasks.delete(task)
+        // A worker is free — pick up anything already due
+        if (this.timer)
+          this.tick()
+      })
+    this.tasks.add(task)
+  }
+
+  private record(outcome: CronRunOutcome, lagMs: number): void {
+    this.completed[outcome.status] = (this.completed[outcome.status] || 0) + 1
+    this.recent.push({ finishedAt: Date.now(), lagMs, durationMs: outcome.durationMs })
+    this.pruneRecent()
+  }
+
+  private pruneRecent(): void {
+    const cutoff = Date.now() - RECENT_WINDOW_MS
+    const firstKept = this.recent.findIndex(r => r.finishedAt >= cutoff)
+    this.recent = firstKept === -1 ? [] : this.recent.slice(firstKept)
+  }
+
+  private bucket(provider: string): TokenBucket {
+    let bucket = this.buckets.get(provider)
+    if (!bucket) {
+      bucket = new TokenBucket(this.options.providerRpm, this.options.providerBurst)
+      this.buckets.set(provider, bucket)
+    }
+    return bucket
+  }
+
+  private computeNext(schedule: string, after: Date): Date | null {
+    try {
+      return nextRun(schedule, after)
+    } catch (error) {
+      console.warn(`[cron] Invalid schedule "${schedule}":`, (error as Error).message)
+      return null
+    }
+  }
+
+  /**
+   * Give enabled cron agents without a next_run_at one. Agents whose schedule
+   * is invalid or never fires are disabled.
+   */
+  private async scheduleNew(): Promise<void> {
+    const c = schema.cronAgents
+    const db = getDb()
+    const pending = await db.select({ id: c.id, schedule: c.schedule })
+      .from(c)
+      .where(and(eq(c.enabled, true), isNull(c.nextRunAt)))
+      .limit(100)
+
+    const now = new Date()
+    for (const cronAgent of pending) {
+      const next = this.computeNext(cronAgent.schedule, now)
+      await db.update(c)
+        .set(next ? { nextRunAt: next } : { enabled: false })
+        .where(and(eq(c.id, cronAgent.id), isNull(c.nextRunAt)))
+    }
+  }
+
+  /**
+   * Runs still 'running' past the timeout belong to a node that died mid-run.
+   */
+  private async reapAbandoned(): Promise<void> {
+    const r = schema.cronAgentRuns
+    const cutoff = new Date(Date.now() - this.options.runTimeoutMs - REAP_GRACE_MS)
+    const reaped = await getDb().update(r)
+      .set({ status: CronRunStatus.ERROR, result: 'Run abandoned: worker stopped before completing', completedAt: new Date() })
+      .where(and(eq(r.status, CronRunStatus.RUNNING), lt(r.startedAt, cutoff)))
+      .returning({ id: r.id })
+
+    if (reaped.length)
+      console.warn(`[cron] Marked ${reaped.length} abandoned run(s) as failed`)
+  }
+
+  getStats(): CronStats {
+    this.pruneRecent()
+    const count = this.recent.length
+    const sum = (pick: (r: RecentRun) => number) => this.recent.reduce((total, r) => total + pick(r), 0)
+
+    return {
+      nodeId: this.nodeId,
+      running: this.timer !== null,
+      concurrency: this.options.concurrency,
+      activeRuns: this.active.size,
+      completed: { ...this.completed },
+      runsPerMinute: count / (RECENT_WINDOW_MS / 60_000),
+      lagMs: {
+        last: this.lastLagMs,
+        avg: count ? sum(r => r.lagMs) / count : 0,
+        max: this.recent.reduce((max, r) => Math.max(max, r.lagMs), 0)
+      },
+      avgDurationMs: count ? sum(r => r.durationMs) / count : 0,
+      rateLimited: Object.fromEntries(
+        Array.from(this.buckets.entries())
+          .filter(([, bucket]) => bucket.waiting > 0)
+          .map(([provider, bucket]) => [provider, bucket.waiting])
+      )
+    }
+  }
+}
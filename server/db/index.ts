@@ -2,6 +2,7 @@ import { drizzle } from 'drizzle-orm/node-postgres'
 import pg from 'pg'
 import { sql } from 'drizzle-orm'
 import * as schema from './schema'
+import { countDbQuery, metricsEnabled } from '~~/server/utils/metrics'
 
 let pool: pg.Pool | null = null
 let db: ReturnType<typeof drizzle<typeof schema>> | null = null
@@ -19,7 +20,8 @@ export function getDb() {
       idleTimeoutMillis: 30000,
       connectionTimeoutMillis: 5000
     })
-    db = drizzle(pool, { schema })
+    // The query logger only feeds the /api/metrics query counter
+    db = drizzle(pool, { schema, logger: metricsEnabled() ? { logQuery: countDbQuery } : undefined })
   }
   return db
 }
@@ -1,4 +1,4 @@
-import { pgTable, text, uuid, jsonb, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, uuid, jsonb, timestamp, index } from 'drizzle-orm/pg-core'
 import { user } from './auth'
 import { installedAgents } from './agents'
 
@@ -7,9 +7,14 @@ export const conversations = pgTable('conversations', {
   userId: text('user_id').notNull().references(() => user.id, { onDelete: 'cascade' }),
   agentId: uuid('agent_id').references(() => installedAgents.id, { onDelete: 'set null' }),
   title: text('title'),
+  // Rolling summary of messages that fell out of the prompt's history window
+  summary: text('summary'),
+  summaryThrough: timestamp('summary_through'),
   createdAt: timestamp('created_at').notNull().defaultNow(),
   updatedAt: timestamp('updated_at').notNull().defaultNow()
-})
+}, table => [
+  index('conversations_user_updated_idx').on(table.userId, table.updatedAt)
+])
 
 export const messages = pgTable('messages', {
   id: uuid('id').primaryKey().defaultRandom(),
@@ -19,4 +24,6 @@ export const messages = pgTable('messages', {
   toolCallsJson: jsonb('tool_calls_json'),
   metadata: jsonb('metadata'),
   createdAt: timestamp('created_at').notNull().defaultNow()
-})
+}, table => [
+  index('messages_conversation_created_idx').on(table.conversationId, table.createdAt)
+])
@@ -1,4 +1,4 @@
-import { pgTable, text, uuid, boolean, integer, real, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, uuid, boolean, integer, real, timestamp, index } from 'drizzle-orm/pg-core'
 import { user } from './auth'
 import { installedAgents } from './agents'
 
@@ -12,9 +12,14 @@ export const cronAgents = pgTable('cron_agents', {
   enabled: boolean('enabled').notNull().default(true),
   maxTurns: integer('max_turns'),
   maxBudget: real('max_budget'),
+  // Computed by the scheduler from `schedule`; null means not yet scheduled
+  nextRunAt: timestamp('next_run_at'),
+  lastRunAt: timestamp('last_run_at'),
   createdAt: timestamp('created_at').notNull().defaultNow(),
   updatedAt: timestamp('updated_at').notNull().defaultNow()
-})
+}, table => [
+  index('cron_agents_due_idx').on(table.enabled, table.nextRunAt)
+])
 
 export const cronAgentRuns = pgTable('cron_agent_runs', {
   id: uuid('id').primaryKey().defaultRandom(),
@@ -23,6 +28,14 @@ export const cronAgentRuns = pgTable('cron_agent_runs', {
   result: text('result'),
   tokensUsed: integer('tokens_used'),
   cost: real('cost'),
+  turns: integer('turns'),
+  // When the run was due; startedAt - scheduledFor is the queue lag
+  scheduledFor: timestamp('scheduled_for'),
+  // Node that claimed the run
+  claimedBy: text('claimed_by'),
   startedAt: timestamp('started_at').notNull().defaultNow(),
   completedAt: timestamp('completed_at')
-})
+}, table => [
+  index('cron_agent_runs_agent_started_idx').on(table.cronAgentId, table.startedAt),
+  index('cron_agent_runs_status_idx').on(table.status, table.startedAt)
+])
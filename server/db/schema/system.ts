@@ -1,4 +1,4 @@
-import { pgTable, text, uuid, jsonb, integer, real, timestamp, unique } from 'drizzle-orm/pg-core'
+import { pgTable, text, uuid, jsonb, integer, bigint, real, doublePrecision, timestamp, date, unique, index } from 'drizzle-orm/pg-core'
 import { user } from './auth'
 import { providers } from './providers'
 
@@ -22,9 +22,32 @@ export const tokenUsage = pgTable('token_usage', {
   source: text('source').notNull(),
   inputTokens: integer('input_tokens').notNull().default(0),
   outputTokens: integer('output_tokens').notNull().default(0),
+  cacheReadTokens: integer('cache_read_tokens').notNull().default(0),
+  cacheWriteTokens: integer('cache_write_tokens').notNull().default(0),
   cost: real('cost'),
   createdAt: timestamp('created_at').notNull().defaultNow()
-})
+}, table => [
+  index('token_usage_user_created_idx').on(table.userId, table.createdAt)
+])
+
+// Per-day rollup of token_usage, maintained incrementally as usage is flushed.
+// modelId/providerId use '' instead of NULL so they can take part in the upsert key.
+export const tokenUsageDaily = pgTable('token_usage_daily', {
+  id: uuid('id').primaryKey().defaultRandom(),
+  userId: text('user_id').notNull().references(() => user.id, { onDelete: 'cascade' }),
+  day: date('day').notNull(),
+  modelId: text('model_id').notNull().default(''),
+  providerId: text('provider_id').notNull().default(''),
+  source: text('source').notNull(),
+  inputTokens: bigint('input_tokens', { mode: 'number' }).notNull().default(0),
+  outputTokens: bigint('output_tokens', { mode: 'number' }).notNull().default(0),
+  cacheReadTokens: bigint('cache_read_tokens', { mode: 'number' }).notNull().default(0),
+  cacheWriteTokens: bigint('cache_write_tokens', { mode: 'number' }).notNull().default(0),
+  cost: doublePrecision('cost').notNull().default(0),
+  calls: integer('calls').notNull().default(0)
+}, table => [
+  unique('token_usage_daily_key_unique').on(table.userId, table.day, table.modelId, table.providerId, table.source)
+])
 
 export const appSettings = pgTable('app_settings', {
   id: uuid('id').primaryKey().defaultRandom(),
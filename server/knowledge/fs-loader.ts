@@ -1,15 +1,28 @@
-import { readdir, readFile } from 'fs/promises'
+import { readdir, readFile, stat } from 'fs/promises'
+import { watch, type FSWatcher } from 'fs'
 import { join, extname, basename } from 'path'
 import { homedir } from 'os'
 import { load as loadYaml } from 'js-yaml'
 import type { AgentKnowledge, KnowledgeFile } from '~~/shared/types/agent'
+import type { FileTreeEntry } from '~~/shared/types'
+import { createLimiter, mapLimit } from '~~/server/utils/concurrency'
 import type { IKnowledgeLoader } from './types'
+import { KnowledgeSearchIndex } from './search-index'
 
+// Only used when the file watcher is unavailable
 const CACHE_TTL_MS = 5 * 60 * 1000
+const IO_CONCURRENCY = 16
 
-interface CacheEntry {
-  knowledge: AgentKnowledge
-  loadedAt: number
+interface StatEntry {
+  type: 'file' | 'directory'
+  mtimeMs: number
+  size: number
+}
+
+interface ParsedEntry {
+  mtimeMs: number
+  size: number
+  file: KnowledgeFile
 }
 
 function resolvePath(knowledgePath: string): string {
@@ -18,6 +31,14 @@ function resolvePath(knowledgePath: string): string {
   return knowledgePath
 }
 
+function isIgnored(name: string): boolean {
+  return name === '__pycache__' || name.endsWith('.pyc') || name.startsWith('.')
+}
+
+function topSegment(relPath: string): string {
+  return relPath.split(/[\\/]/)[0] || ''
+}
+
 function getFileType(ext: string): KnowledgeFile['type'] | null {
   switch (ext.toLowerCase()) {
     case '.md':
@@ -35,86 +56,308 @@ function getFileType(ext: string): KnowledgeFile['type'] | null {
   }
 }
 
+function parseContent(fileType: KnowledgeFile['type'], raw: string): unknown {
+  if (fileType === 'json') {
+    try {
+      return JSON.parse(raw)
+    } catch {
+      return raw
+    }
+  }
+  if (fileType === 'yaml') {
+    try {
+      return loadYaml(raw)
+    } catch {
+      return raw
+    }
+  }
+  return raw
+}
+
+/**
+ * In-memory view of the knowledge directory, kept fresh by a recursive
+ * file watcher. Stats are held for every entry (serving the file tree) and
+ * parsed content is held per file keyed by mtime + size, so a change only
+ * re-reads the files that actually changed. Top-level directories are
+ * rescanned lazily when the watcher (or an explicit invalidate) marks them dirty.
+ */
 export class FilesystemKnowledgeLoader implements IKnowledgeLoader {
   private basePath: string
-  private cache = new Map<string, CacheEntry>()
+  private entries = new Map<string, StatEntry>()
+  private parsed = new Map<string, ParsedEntry>()
+  private knowledge = new Map<string, AgentKnowledge>()
+  // Search indexes outlive cache entries so reloads only re-chunk changed files
+  private indexes = new Map<string, KnowledgeSearchIndex>()
+
+  private rootScannedAt = 0
+  private rootDirty = true
+  private dirty = new Set<string>()
+  private scannedAt = new Map<string, number>()
+  private pending = new Map<string, Promise<void>>()
+  private watcher: FSWatcher | null = null
+  // Caps readdir/stat calls across every directory walk in flight
+  private io = createLimiter(IO_CONCURRENCY)
 
   constructor(knowledgePath: string) {
     this.basePath = resolvePath(knowledgePath)
   }
 
+  /**
+   * Start the recursive watcher. Without it the loader falls back to
+   * TTL-based rescans plus explicit invalidate() calls.
+   */
+  watch(): void {
+    if (this.watcher)
+      return
+    try {
+      this.watcher = watch(this.basePath, { recursive: true }, (_event, filename) => {
+        if (filename)
+          this.markDirty(topSegment(filename.toString()))
+        else
+          this.invalidateAll()
+      })
+      this.watcher.on('error', (err) => {
+        console.warn('[knowledge] Watcher failed, falling back to TTL rescans:', err)
+        this.close()
+        this.invalidateAll()
+      })
+    } catch (err) {
+      console.warn(`[knowledge] Could not watch ${this.basePath}, falling back to TTL rescans:`, err)
+      this.watcher = null
+    }
+  }
+
+  close(): void {
+    this.watcher?.close()
+    this.watcher = null
+  }
+
   async load(agentId: string): Promise<AgentKnowledge> {
-    const cached = this.cache.get(agentId)
-    if (cached && Date.now() - cached.loadedAt < CACHE_TTL_MS)
-      return cached.knowledge
+    await this.refresh([agentId])
 
-    const dirPath = join(this.basePath, agentId)
-    const empty: AgentKnowledge = { files: [], text: '' }
+    const cached = this.knowledge.get(agentId)
+    if (cached)
+      return cached
 
-    let entries: string[]
-    try {
-      entries = await readdir(dirPath)
-    } catch {
-      this.cache.set(agentId, { knowledge: empty, loadedAt: Date.now() })
-      return empty
-    }
+    const prefix = `${agentId}/`
+    const paths = [...this.entries.entries()]
+      .filter(([path, entry]) => entry.type === 'file' && path.startsWith(prefix) && getFileType(extname(path)))
+      .map(([path]) => path)
+      .sort()
 
-    const files: KnowledgeFile[] = []
-    const textParts: string[] = []
-
-    for (const entry of entries) {
-      const ext = extname(entry)
-      const fileType = getFileType(ext)
-      if (!fileType)
-        continue
-
-      try {
-        const filePath = join(dirPath, entry)
-        const raw = await readFile(filePath, 'utf-8')
-        let content: unknown = raw
-
-        if (fileType === 'json') {
-          try {
-            content = JSON.parse(raw)
-          } catch {
-            content = raw
-          }
-        } else if (fileType === 'yaml') {
-          try {
-            content = loadYaml(raw)
-          } catch {
-            content = raw
-          }
-        }
-
-        files.push({
-          path: entry,
-          name: basename(entry, ext),
-          type: fileType,
-          content,
-          raw
-        })
-
-        textParts.push(`### ${entry}\n${raw}`)
-      } catch (err) {
-        console.warn(`[knowledge] Failed to read ${entry}:`, err)
-      }
-    }
+    const files = (await mapLimit(paths, IO_CONCURRENCY, path => this.readParsed(path)))
+      .filter((f): f is KnowledgeFile => f !== null)
+
+    const index = this.getIndex(agentId)
+    index.sync(files)
 
     const knowledge: AgentKnowledge = {
       files,
-      text: textParts.join('\n\n')
+      text: files.map(f => `### ${f.path}\n${f.raw}`).join('\n\n'),
+      search: (query, k) => index.search(query, k)
     }
 
-    this.cache.set(agentId, { knowledge, loadedAt: Date.now() })
+    this.knowledge.set(agentId, knowledge)
     return knowledge
   }
 
+  async getTree(): Promise<FileTreeEntry[]> {
+    await this.refresh()
+    return this.buildTree()
+  }
+
   invalidate(agentId: string): void {
-    this.cache.delete(agentId)
+    this.markDirty(agentId)
   }
 
   invalidateAll(): void {
-    this.cache.clear()
+    this.rootDirty = true
+    for (const segment of this.scannedAt.keys())
+      this.dirty.add(segment)
+    this.knowledge.clear()
+  }
+
+  private markDirty(segment: string): void {
+    // Any change may add or remove a top-level directory
+    this.rootDirty = true
+    if (segment) {
+      this.dirty.add(segment)
+      this.knowledge.delete(segment)
+    }
+  }
+
+  private isStale(segment: string): boolean {
+    if (this.dirty.has(segment) || !this.scannedAt.has(segment))
+      return true
+    return !this.watcher && Date.now() - this.scannedAt.get(segment)! >= CACHE_TTL_MS
+  }
+
+  /**
+   * Rescan the root listing if needed, then every stale top-level directory
+   * in `segments` (all of them when omitted). Concurrent callers share scans.
+   */
+  private async refresh(segments?: string[]): Promise<void> {
+    const rootStale = !this.watcher && Date.now() - this.rootScannedAt >= CACHE_TTL_MS
+    if (!this.rootScannedAt || this.rootDirty || rootStale)
+      await this.singleFlight('', () => this.scanRoot())
+
+    const targets = segments ?? [...this.entries.keys()].filter(p => !p.includes('/'))
+    await Promise.all(targets
+      .filter(segment => this.entries.get(segment)?.type === 'directory' || this.scannedAt.has(segment))
+      .filter(segment => this.isStale(segment))
+      .map(segment => this.singleFlight(segment, () => this.scanSegment(segment))))
+  }
+
+  private async singleFlight(key: string, fn: () => Promise<void>): Promise<void> {
+    const existing = this.pending.get(key)
+    if (existing)
+      return existing
+    const promise = fn().finally(() => this.pending.delete(key))
+    this.pending.set(key, promise)
+    return promise
+  }
+
+  private async scanRoot(): Promise<void> {
+    this.rootDirty = false
+    const names = (await this.io(() => readdir(this.basePath)).catch(() => [] as string[])).filter(n => !isIgnored(n))
+    const stats = await Promise.all(names.map(name => this.io(() => stat(join(this.basePath, name))).catch(() => null)))
+
+    const seen = new Set<string>()
+    names.forEach((name, i) => {
+      const s = stats[i]
+      if (!s)
+        return
+      seen.add(name)
+      const previous = this.entries.get(name)
+      const type = s.isDirectory() ? 'directory' : 'file'
+      this.entries.set(name, { type, mtimeMs: s.mtimeMs, size: s.size })
+      if (type === 'directory' && previous?.type !== 'directory')
+        this.dirty.add(name)
+    })
+
+    for (const path of [...this.entries.keys()]) {
+      if (!path.includes('/') && !seen.has(path))
+        this.purge(path)
+    }
+    this.rootScannedAt = Date.now()
+  }
+
+  private async scanSegment(segment: string): Promise<void> {
+    this.dirty.delete(segment)
+    this.knowledge.delete(segment)
+
+    const seen = new Set<string>([segment])
+    const exists = this.entries.get(segment)?.type === 'directory'
+    if (exists)
+      await this.scanDir(segment, seen)
+
+    const prefix = `${segment}/`
+    for (const path of [...this.entries.keys()]) {
+      if (path.startsWith(prefix) && !seen.has(path)) {
+        this.entries.delete(path)
+        this.parsed.delete(path)
+      }
+    }
+    this.scannedAt.set(segment, Date.now())
+  }
+
+  private async scanDir(relDir: string, seen: Set<string>): Promise<void> {
+    const names = (await this.io(() => readdir(join(this.basePath, relDir))).catch(() => [] as string[])).filter(n => !isIgnored(n))
+
+    // Subdirectories are walked as soon as they are found; the shared limiter
+    // bounds the I/O across the whole tree rather than per directory
+    await Promise.all(names.map(async (name) => {
+      const relPath = `${relDir}/${name}`
+      const s = await this.io(() => stat(join(this.basePath, relPath))).catch(() => null)
+      if (!s)
+        return
+      seen.add(relPath)
+      const type = s.isDirectory() ? 'directory' : 'file'
+      this.entries.set(relPath, { type, mtimeMs: s.mtimeMs, size: s.size })
+      if (type === 'directory')
+        await this.scanDir(relPath, seen)
+    }))
+  }
+
+  private purge(segment: string): void {
+    const prefix = `${segment}/`
+    for (const path of [...this.entries.keys()]) {
+      if (path === segment || path.startsWith(prefix)) {
+        this.entries.delete(path)
+        this.parsed.delete(path)
+      }
+    }
+    this.dirty.delete(segment)
+    this.scannedAt.delete(segment)
+    this.knowledge.delete(segment)
+  }
+
+  private async readParsed(relPath: string): Promise<KnowledgeFile | null> {
+    const entry = this.entries.get(relPath)!
+    const cached = this.parsed.get(relPath)
+    if (cached && cached.mtimeMs === entry.mtimeMs && cached.size === entry.size)
+      return cached.file
+
+    const ext = extname(relPath)
+    const fileType = getFileType(ext)!
+    try {
+      const raw = await readFile(join(this.basePath, relPath), 'utf-8')
+      const path = relPath.slice(relPath.indexOf('/') + 1)
+      const file: KnowledgeFile = {
+        path,
+        name: basename(path, ext),
+        type: fileType,
+        content: parseContent(fileType, raw),
+        raw
+      }
+      this.parsed.set(relPath, { mtimeMs: entry.mtimeMs, size: entry.size, file })
+      return file
+    } catch (err) {
+      console.warn(`[knowledge] Failed to read ${relPath}:`, err)
+      return null
+    }
+  }
+
+  private buildTree(): FileTreeEntry[] {
+    const root: FileTreeEntry[] = []
+    const dirs = new Map<string, FileTreeEntry>()
+
+    // Parents sort before their children, so each parent exists when reached
+    for (const path of [...this.entries.keys()].sort()) {
+      const entry = this.entries.get(path)!
+      const slash = path.lastIndexOf('/')
+      const node: FileTreeEntry = entry.type === 'directory'
+        ? { name: path.slice(slash + 1), path, type: 'directory', children: [] }
+        : { name: path.slice(slash + 1), path, type: 'file' }
+      if (entry.type === 'directory')
+        dirs.set(path, node)
+
+      const siblings = slash === -1 ? root : dirs.get(path.slice(0, slash))?.children
+      siblings?.push(node)
+    }
+
+    // Sort: directories first, then alphabetical
+    const sortEntries = (files: FileTreeEntry[]) => {
+      files.sort((a, b) => {
+        if (a.type !== b.type) return a.type === 'directory' ? -1 : 1
+        return a.name.localeCompare(b.name)
+      })
+      for (const file of files) {
+        if (file.children)
+          sortEntries(file.children)
+      }
+    }
+    sortEntries(root)
+
+    return root
+  }
+
+  private getIndex(agentId: string): KnowledgeSearchIndex {
+    let index = this.indexes.get(agentId)
+    if (!index) {
+      index = new KnowledgeSearchIndex()
+      this.indexes.set(agentId, index)
+    }
+    return index
   }
 }
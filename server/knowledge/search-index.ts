@@ -0,0 +1,221 @@
+import type { KnowledgeFile, KnowledgeSearchResult } from '~~/shared/types/agent'
+import { estimateTokens } from '~~/server/ai/tokens'
+
+// BM25 tuning — standard defaults
+const K1 = 1.2
+const B = 0.75
+
+const MAX_CHUNK_CHARS = 1200
+const DEFAULT_TOP_K = 5
+
+const STOPWORDS = new Set([
+  'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'does', 'for',
+  'from', 'how', 'i', 'if', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or',
+  'so', 'that', 'the', 'their', 'then', 'there', 'these', 'this', 'to', 'was', 'we',
+  'what', 'when', 'where', 'which', 'who', 'why', 'will', 'with', 'you', 'your'
+])
+
+interface Chunk {
+  id: number
+  path: string
+  heading?: string
+  text: string
+  tokens: number
+  length: number
+}
+
+export function tokenize(text: string): string[] {
+  const terms = text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []
+  return terms.filter(t => !STOPWORDS.has(t))
+}
+
+/**
+ * Split a file into chunks of at most MAX_CHUNK_CHARS, breaking on blank lines.
+ * Markdown headings start a new chunk and are carried as the chunk's heading.
+ */
+export function chunkFile(file: KnowledgeFile): Array<{ heading?: string, text: string }> {
+  const chunks: Array<{ heading?: string, text: string }> = []
+  const isMarkdown = file.type === 'markdown'
+  let heading: string | undefined
+  let text = ''
+
+  const flush = () => {
+    const trimmed = text.trim()
+    if (trimmed)
+      chunks.push({ heading, text: trimmed })
+    text = ''
+  }
+
+  // Paragraphs are joined with a blank line, lines of one block with a newline
+  const push = (piece: string, separator: string) => {
+    if (text && text.length + separator.length + piece.length > MAX_CHUNK_CHARS)
+      flush()
+    text = text ? text + separator + piece : piece
+  }
+
+  for (const block of file.raw.split(/\n\s*\n/)) {
+    const trimmed = block.trim()
+    if (!trimmed)
+      continue
+
+    const headingMatch = isMarkdown ? trimmed.match(/^#{1,6}\s+(.+)/) : null
+    if (headingMatch) {
+      flush()
+      heading = headingMatch[1]!.trim()
+    }
+
+    if (trimmed.length <= MAX_CHUNK_CHARS) {
+      push(trimmed, '\n\n')
+      continue
+    }
+
+    // Oversized block (large YAML/JSON documents) — fall back to line windows,
+    // hard-splitting lines that are too long on their own (minified JSON, base64)
+    trimmed.split('\n').forEach((line, i) => {
+      for (let start = 0; start < line.length; start += MAX_CHUNK_CHARS)
+        push(line.slice(start, start + MAX_CHUNK_CHARS), i === 0 && start === 0 ? '\n\n' : '\n')
+    })
+  }
+  flush()
+
+  return chunks
+}
+
+/**
+ * In-memory inverted index over knowledge chunks, scored with BM25.
+ * Files are indexed independently so a single changed file can be
+ * re-chunked without rebuilding the rest of the index.
+ */
+export class KnowledgeSearchIndex {
+  private nextId = 0
+  private chunks = new Map<number, Chunk>()
+  private fileChunks = new Map<string, { raw: string, ids: number[], terms: Set<string> }>()
+  private postings = new Map<string, Map<number, number>>()
+  private totalLength = 0
+
+  get size(): number {
+    return this.chunks.size
+  }
+
+  /**
+   * Bring the index in line with the given file set. Only files whose
+   * content changed are re-chunked; files no longer present are dropped.
+   */
+  sync(files: KnowledgeFile[]): void {
+    const seen = new Set<string>()
+    for (const file of files) {
+      seen.add(file.path)
+      if (this.fileChunks.get(file.path)?.raw !== file.raw)
+        this.upsertFile(file)
+    }
+    for (const path of [...this.fileChunks.keys()]) {
+      if (!seen.has(path))
+        this.removeFile(path)
+    }
+  }
+
+  upsertFile(file: KnowledgeFile): void {
+    this.removeFile(file.path)
+
+    const ids: number[] = []
+    const fileTerms = new Set<string>()
+    for (const { heading, text } of chunkFile(file)) {
+      const id = this.nextId++
+      const terms = tokenize(heading ? `${heading}\n${text}` : text)
+      const chunk: Chunk = {
+        id,
+        path: file.path,
+        heading,
+        text,
+        tokens: estimateTokens(text),
+        length: terms.length
+      }
+      this.chunks.set(id, chunk)
+      this.totalLength += chunk.length
+      ids.push(id)
+
+      for (const term of terms) {
+        fileTerms.add(term)
+        let posting = this.postings.get(term)
+        if (!posting) {
+          posting = new Map()
+          this.postings.set(term, posting)
+        }
+        posting.set(id, (posting.get(id) || 0) + 1)
+      }
+    }
+
+    this.fileChunks.set(file.path, { raw: file.raw, ids, terms: fileTerms })
+  }
+
+  removeFile(path: string): void {
+    const entry = this.fileChunks.get(path)
+    if (!entry)
+      return
+
+    for (const id of entry.ids) {
+      const chunk = this.chunks.get(id)
+      if (chunk)
+        this.totalLength -= chunk.length
+      this.chunks.delete(id)
+    }
+
+    // Only visit postings for terms this file contributed
+    for (const term of entry.terms) {
+      const posting = this.postings.get(term)
+      if (!posting)
+        continue
+      for (const id of entry.ids)
+        posting.delete(id)
+      if (!posting.size)
+        this.postings.delete(term)
+    }
+
+    this.fileChunks.delete(path)
+  }
+
+  search(query: string, k = DEFAULT_TOP_K): KnowledgeSearchResult[] {
+    const n = this.chunks.size
+    if (!n || k <= 0)
+      return []
+
+    const avgLength = this.totalLength / n || 1
+    const scores = new Map<number, number>()
+
+    for (const term of new Set(tokenize(query))) {
+      const posting = this.postings.get(term)
+      if (!posting)
+        continue
+
+      const idf = Math.log(1 + (n - posting.size + 0.5) / (posting.size + 0.5))
+      for (const [id, tf] of posting) {
+        const length = this.chunks.get(id)!.length
+        const norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avgLength))
+        scores.set(id, (scores.get(id) || 0) + idf * norm)
+      }
+    }
+
+    return [...scores.entries()]
+      .sort((a, b) => b[1] - a[1])
+      .slice(0, k)
+      .map(([id, score]) => {
+        const chunk = this.chunks.get(id)!
+        return {
+          path: chunk.path,
+          heading: chunk.heading,
+          text: chunk.text,
+          score,
+          tokens: chunk.tokens
+        }
+      })
+  }
+}
+
+/**
+ * Render search results as a prompt section, one block per chunk.
+ */
+export function formatSearchResults(results: KnowledgeSearchResult[]): string {
+  return results
+    .map(r => `### ${r.path}${r.heading ? ` — ${r.heading}` : ''}\n${r.text}`)
+    .join('\n\n')
+}
@@ -1,7 +1,11 @@
 import type { AgentKnowledge } from '~~/shared/types/agent'
+import type { FileTreeEntry } from '~~/shared/types'
 
 export interface IKnowledgeLoader {
   load(agentId: string): Promise<AgentKnowledge>
+  getTree(): Promise<FileTreeEntry[]>
   invalidate(agentId: string): void
   invalidateAll(): void
+  watch(): void
+  close(): void
 }
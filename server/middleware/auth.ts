@@ -1,5 +1,6 @@
 import type { H3Event } from 'h3'
-import { getAuth } from '~~/server/utils/auth'
+import { getCachedSession } from '~~/server/utils/session-cache'
+import { timeStage } from '~~/server/utils/metrics'
 
 const publicPaths = [
   '/api/auth',
@@ -24,9 +25,7 @@ export default defineEventHandler(async (event: H3Event) => {
   if (path.match(/\.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot)$/))
     return
 
-  const session = await getAuth().api.getSession({
-    headers: event.headers
-  })
+  const session = await timeStage('auth', () => getCachedSession(event.headers), event)
 
   if (!session) {
     if (path.startsWith('/api/')) {
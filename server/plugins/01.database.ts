@@ -1,4 +1,6 @@
 import { warmupDb, closeDb } from '~~/server/db'
+import { flushTokenUsage } from '~~/server/ai/usage'
+import { stopCronScheduler } from '~~/server/cron'
 
 export default defineNitroPlugin(async (nitroApp) => {
   const connected = await warmupDb()
@@ -6,6 +8,10 @@ export default defineNitroPlugin(async (nitroApp) => {
     console.warn('[db] Failed to connect — app may not function correctly')
 
   nitroApp.hooks.hook('close', async () => {
+    // Let cancelled cron runs record their status, then drain write-behind
+    // buffers, while the pool is still open
+    await stopCronScheduler()
+    await flushTokenUsage()
     await closeDb()
     console.log('[db] Connection closed')
   })
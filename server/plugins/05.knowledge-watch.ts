@@ -0,0 +1,18 @@
+import { getKnowledgeLoader } from '~~/server/knowledge'
+
+export default defineNitroPlugin(async (nitroApp) => {
+  const loader = getKnowledgeLoader()
+  loader.watch()
+
+  try {
+    // Prime the in-memory tree so the first /knowledge page load is served from memory
+    await loader.getTree()
+    console.log('[knowledge] Watching knowledge directory')
+  } catch (error) {
+    console.error('[knowledge] Failed to scan knowledge directory:', error)
+  }
+
+  nitroApp.hooks.hook('close', () => {
+    loader.close()
+  })
+})
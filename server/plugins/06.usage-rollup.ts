@@ -0,0 +1,10 @@
+import { backfillUsageRollup } from '~~/server/ai/usage'
+
+export default defineNitroPlugin(async () => {
+  try {
+    if (await backfillUsageRollup())
+      console.log('[usage] Daily usage rollup backfilled')
+  } catch (error) {
+    console.error('[usage] Failed to backfill daily usage rollup:', error)
+  }
+})
@@ -0,0 +1,14 @@
+import { prewarmAgents } from '~~/server/agents/loader'
+import { seedDefaultAgent } from '~~/server/agents/seed'
+
+export default defineNitroPlugin(async () => {
+  try {
+    // Plugins are not awaited in order — wait for the seed so a fresh
+    // database's default agent is included
+    await seedDefaultAgent()
+    const count = await prewarmAgents()
+    console.log(`[agents] Pre-warmed ${count} agent(s)`)
+  } catch (error) {
+    console.error('[agents] Failed to pre-warm agents:', error)
+  }
+})
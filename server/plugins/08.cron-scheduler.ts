@@ -0,0 +1,14 @@
+import { getCronScheduler } from '~~/server/cron'
+
+export default defineNitroPlugin(() => {
+  const config = useRuntimeConfig()
+  if (!config.cronEnabled) {
+    console.log('[cron] Scheduler disabled')
+    return
+  }
+
+  // Shutdown is handled by the 01.database close hook, before the pool closes
+  const scheduler = getCronScheduler()
+  scheduler.start()
+  console.log(`[cron] Scheduler started on ${scheduler.nodeId} (concurrency ${config.cronConcurrency})`)
+})
@@ -0,0 +1,25 @@
+import { countRequest, metricsEnabled, serverTimingHeader } from '~~/server/utils/metrics'
+
+export default defineNitroPlugin((nitroApp) => {
+  if (!metricsEnabled())
+    return
+
+  nitroApp.hooks.hook('request', (event) => {
+    event.context.requestStart = performance.now()
+    const path = event.path
+    // Polling the metrics themselves would skew the per-request figures
+    if (path.startsWith('/api/') && !path.startsWith('/api/metrics'))
+      countRequest()
+  })
+
+  // Streamed responses report the time to the first byte; stream
+  // duration is only in the histograms
+  nitroApp.hooks.hook('beforeResponse', (event) => {
+    const start = event.context.requestStart as number | undefined
+    const header = serverTimingHeader(event, start === undefined ? undefined : performance.now() - start)
+    if (header)
+      setResponseHeader(event, 'Server-Timing', header)
+  })
+
+  console.log('[metrics] Stage timing enabled at /api/metrics')
+})
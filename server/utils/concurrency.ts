@@ -0,0 +1,72 @@
+/**
+ * Map over items with at most `limit` promises in flight.
+ * Results keep the input order.
+ */
+export async function mapLimit<T, R>(
+  items: readonly T[],
+  limit: number,
+  fn: (item: T, index: number) => Promise<R>
+): Promise<R[]> {
+  const results = new Array<R>(items.length)
+  let next = 0
+
+  const worker = async () => {
+    while (next < items.length) {
+      const i = next++
+      results[i] = await fn(items[i]!, i)
+    }
+  }
+
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker))
+  return results
+}
+
+/**
+ * Create a limiter that runs at most `limit` tasks at once; the rest wait
+ * in FIFO order. Share one limiter to cap work spread across many callers.
+ */
+export function createLimiter(limit: number): <T>(fn: () => Promise<T>) => Promise<T> {
+  let active = 0
+  const waiting: Array<() => void> = []
+
+  return async <T>(fn: () => Promise<T>): Promise<T> => {
+    if (active < limit)
+      active++
+    else
+      await new Promise<void>(resolve => waiting.push(resolve))
+
+    try {
+      return await fn()
+    } finally {
+      // Hand the slot straight to the next waiter, if any
+      const next = waiting.shift()
+      if (next)
+        next()
+      else
+        active--
+    }
+  }
+}
+
+/**
+ * Return the cached promise for `key`, starting `fn` on a miss. Concurrent
+ * callers share the in-flight promise; a rejected promise is evicted so the
+ * next call retries.
+ */
+export function singleFlight<K, V>(
+  cache: Map<K, Promise<V>>,
+  key: K,
+  fn: () => Promise<V>
+): Promise<V> {
+  let pending = cache.get(key)
+  if (!pending) {
+    pending = fn()
+    cache.set(key, pending)
+    const started = pending
+    started.catch(() => {
+      if (cache.get(key) === started)
+        cache.delete(key)
+    })
+  }
+  return pending
+}
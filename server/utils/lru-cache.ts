@@ -0,0 +1,53 @@
+interface LruEntry<V> {
+  value: V
+  expiresAt: number
+}
+
+/**
+ * Size-bounded LRU with per-entry expiry. Relies on Map insertion order:
+ * reads re-insert the entry so the first key is always the least recent.
+ */
+export class LruCache<K, V> {
+  private map = new Map<K, LruEntry<V>>()
+
+  constructor(private maxSize: number, private ttlMs: number) {}
+
+  get size(): number {
+    return this.map.size
+  }
+
+  get(key: K): V | undefined {
+    const entry = this.map.get(key)
+    if (!entry)
+      return undefined
+    this.map.delete(key)
+    if (entry.expiresAt <= Date.now())
+      return undefined
+    this.map.set(key, entry)
+    return entry.value
+  }
+
+  set(key: K, value: V, ttlMs = this.ttlMs): void {
+    if (this.maxSize <= 0 || ttlMs <= 0)
+      return
+    this.map.delete(key)
+    this.map.set(key, { value, expiresAt: Date.now() + ttlMs })
+    while (this.map.size > this.maxSize)
+      this.map.delete(this.map.keys().next().value!)
+  }
+
+  delete(key: K): void {
+    this.map.delete(key)
+  }
+
+  deleteWhere(predicate: (value: V, key: K) => boolean): void {
+    for (const [key, entry] of this.map) {
+      if (predicate(entry.value, key))
+        this.map.delete(key)
+    }
+  }
+
+  clear(): void {
+    this.map.clear()
+  }
+}
@@ -0,0 +1,151 @@
+import type { H3Event } from 'h3'
+
+// Request-stage timings, exposed as Server-Timing headers and as histograms
+// on /api/metrics. Off unless NUXT_METRICS_ENABLED is set.
+
+// Histogram bucket upper bounds in ms; the last bucket is open-ended
+const BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10_000, 30_000, 60_000]
+
+// persist: the user message insert before streaming; persistReply: the
+// assistant message insert and conversation update after it
+export type Stage = 'auth' | 'loadAgent' | 'resolveModel' | 'knowledge' | 'history' | 'persist' | 'persistReply' | 'stream'
+
+export interface HistogramSnapshot {
+  count: number
+  sumMs: number
+  avgMs: number
+  maxMs: number
+  p50Ms: number
+  p95Ms: number
+  p99Ms: number
+  buckets: Array<{ le: number | null, count: number }>
+}
+
+export interface MetricsSnapshot {
+  uptimeMs: number
+  requests: number
+  dbQueries: number
+  stages: Record<string, HistogramSnapshot>
+}
+
+class Histogram {
+  private counts = new Array<number>(BUCKETS_MS.length + 1).fill(0)
+  private count = 0
+  private sum = 0
+  private max = 0
+
+  observe(ms: number): void {
+    let i = BUCKETS_MS.findIndex(bound => ms <= bound)
+    if (i === -1)
+      i = BUCKETS_MS.length
+    this.counts[i]!++
+    this.count++
+    this.sum += ms
+    this.max = Math.max(this.max, ms)
+  }
+
+  // Linear interpolation within the bucket holding the quantile
+  private quantile(q: number): number {
+    if (!this.count)
+      return 0
+    const rank = q * this.count
+    let seen = 0
+    for (let i = 0; i < this.counts.length; i++) {
+      const inBucket = this.counts[i]!
+      if (seen + inBucket >= rank && inBucket > 0) {
+        const lower = i === 0 ? 0 : BUCKETS_MS[i - 1]!
+        const upper = Math.min(BUCKETS_MS[i] ?? this.max, this.max)
+        return lower + (upper - lower) * ((rank - seen) / inBucket)
+      }
+      seen += inBucket
+    }
+    return this.max
+  }
+
+  snapshot(): HistogramSnapshot {
+    return {
+      count: this.count,
+      sumMs: this.sum,
+      avgMs: this.count ? this.sum / this.count : 0,
+      maxMs: this.max,
+      p50Ms: this.quantile(0.5),
+      p95Ms: this.quantile(0.95),
+      p99Ms: this.quantile(0.99),
+      buckets: this.counts.map((count, i) => ({ le: BUCKETS_MS[i] ?? null, count }))
+    }
+  }
+}
+
+const startedAt = Date.now()
+const stages = new Map<string, Histogram>()
+let requests = 0
+let dbQueries = 0
+let enabled: boolean | null = null
+
+export function metricsEnabled(): boolean {
+  if (enabled === null)
+    enabled = Boolean(useRuntimeConfig().metricsEnabled)
+  return enabled
+}
+
+/**
+ * Record a stage duration. With an event, it is also added to that
+ * response's Server-Timing header.
+ */
+export function recordStage(stage: Stage, ms: number, event?: H3Event): void {
+  if (!metricsEnabled())
+    return
+
+  let histogram = stages.get(stage)
+  if (!histogram) {
+    histogram = new Histogram()
+    stages.set(stage, histogram)
+  }
+  histogram.observe(ms)
+
+  if (event) {
+    const timings: Array<{ stage: Stage, ms: number }> = event.context.serverTiming ||= []
+    timings.push({ stage, ms })
+  }
+}
+
+export async function timeStage<T>(stage: Stage, fn: () => Promise<T>, event?: H3Event): Promise<T> {
+  if (!metricsEnabled())
+    return fn()
+  const start = performance.now()
+  try {
+    return await fn()
+  } finally {
+    recordStage(stage, performance.now() - start, event)
+  }
+}
+
+export function countRequest(): void {
+  requests++
+}
+
+export function countDbQuery(): void {
+  dbQueries++
+}
+
+/**
+ * Server-Timing header value for the stages recorded on this request.
+ */
+export function serverTimingHeader(event: H3Event, totalMs?: number): string | null {
+  const timings: Array<{ stage: Stage, ms: number }> = event.context.serverTiming || []
+  const entries = timings.map(t => `${t.stage};dur=${t.ms.toFixed(1)}`)
+  if (totalMs !== undefined)
+    entries.push(`total;dur=${totalMs.toFixed(1)}`)
+  return entries.length ? entries.join(', ') : null
+}
+
+export function getMetricsSnapshot(): MetricsSnapshot {
+  return {
+    uptimeMs: Date.now() - startedAt,
+    requests,
+    dbQueries,
+    stages: Object.fromEntries(
+      Array.from(stages.entries()).map(([stage, histogram]) => [stage, histogram.snapshot()])
+    )
+  }
+}
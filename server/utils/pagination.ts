@@ -0,0 +1,44 @@
+// Keyset pagination cursors. The timestamp is kept as Postgres text so
+// microsecond precision survives the round trip (JS Dates stop at ms).
+export interface PageCursor {
+  ts: string
+  id: string
+}
+
+// timestamp::text output, e.g. 2026-01-31 12:00:00.123456
+const TS_PATTERN = /^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?$/
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i
+
+// Date.parse rolls over out-of-range fields (Feb 31), so round-trip instead
+function isValidTs(ts: string): boolean {
+  if (!TS_PATTERN.test(ts))
+    return false
+  const seconds = ts.slice(0, 19).replace(' ', 'T')
+  const parsed = new Date(`${seconds}Z`)
+  return !Number.isNaN(parsed.getTime()) && parsed.toISOString().startsWith(seconds)
+}
+
+export function encodeCursor(cursor: PageCursor): string {
+  return Buffer.from(JSON.stringify([cursor.ts, cursor.id])).toString('base64url')
+}
+
+export function decodeCursor(value: unknown): PageCursor | null {
+  if (!value)
+    return null
+  try {
+    const [ts, id] = JSON.parse(Buffer.from(String(value), 'base64url').toString('utf-8'))
+    // Both are cast in SQL, so a tampered cursor must fail here, not in Postgres
+    if (typeof ts === 'string' && typeof id === 'string' && isValidTs(ts) && UUID_PATTERN.test(id))
+      return { ts, id }
+  } catch {
+    // fall through
+  }
+  throw createError({ statusCode: 400, message: 'Invalid cursor' })
+}
+
+export function parseLimit(value: unknown, defaultLimit = 50, maxLimit = 200): number {
+  const limit = Number(value)
+  if (!Number.isInteger(limit) || limit <= 0)
+    return defaultLimit
+  return Math.min(limit, maxLimit)
+}
@@ -0,0 +1,89 @@
+import { createHash } from 'crypto'
+import { getAuth } from '~~/server/utils/auth'
+import { LruCache } from '~~/server/utils/lru-cache'
+
+type AuthSession = NonNullable<Awaited<ReturnType<ReturnType<typeof getAuth>['api']['getSession']>>>
+
+let _cache: LruCache<string, AuthSession> | null = null
+
+function getCache(): LruCache<string, AuthSession> {
+  if (!_cache) {
+    const config = useRuntimeConfig()
+    _cache = new LruCache(Number(config.sessionCacheMax), Number(config.sessionCacheTtlMs))
+  }
+  return _cache
+}
+
+function hash(value: string): string {
+  return createHash('sha256').update(value).digest('base64url')
+}
+
+/**
+ * Derive a cache key from whichever credential the request carries:
+ * the better-auth session cookie, an API key, or a bearer token.
+ */
+export function sessionCacheKey(headers: Headers): string | null {
+  const cookie = headers.get('cookie')
+  if (cookie) {
+    for (const part of cookie.split(';')) {
+      const [name, ...rest] = part.trim().split('=')
+      // Matches both better-auth.session_token and __Secure-better-auth.session_token
+      if (name?.endsWith('better-auth.session_token') && rest.length)
+        return `cookie:${hash(rest.join('='))}`
+    }
+  }
+
+  const apiKey = headers.get('x-api-key')
+  if (apiKey)
+    return `apikey:${hash(apiKey)}`
+
+  const authorization = headers.get('authorization')
+  if (authorization?.startsWith('Bearer '))
+    return `bearer:${hash(authorization.slice(7))}`
+
+  return null
+}
+
+/**
+ * getSession() with a short-TTL in-process cache in front of it.
+ * Only successful lookups are cached, and never past the session's own expiry.
+ */
+export async function getCachedSession(headers: Headers): Promise<AuthSession | null> {
+  const key = sessionCacheKey(headers)
+  if (!key)
+    return null
+
+  const cache = getCache()
+  const cached = cache.get(key)
+  if (cached)
+    return cached
+
+  const session = await getAuth().api.getSession({ headers })
+  if (!session)
+    return null
+
+  const config = useRuntimeConfig()
+  const untilExpiry = new Date(session.session.expiresAt).getTime() - Date.now()
+  cache.set(key, session, Math.min(Number(config.sessionCacheTtlMs), untilExpiry))
+  return session
+}
+
+/**
+ * Resolve the user behind a request, preferring the cache over a DB lookup.
+ */
+export async function getSessionUserId(headers: Headers): Promise<string | null> {
+  const key = sessionCacheKey(headers)
+  const cached = key ? getCache().get(key) : undefined
+  if (cached)
+    return cached.user.id
+  const session = await getAuth().api.getSession({ headers }).catch(() => null)
+  return session?.user.id ?? null
+}
+
+export function evictUserSessions(userId: string): void {
+  getCache().deleteWhere(session => session.user.id === userId)
+}
+
+export function clearSessionCache(): void {
+  getCache().clear()
+}
@@ -0,0 +1,72 @@
+/**
+ * Token-bucket rate limiter. Holds up to `capacity` tokens, refilled
+ * continuously at `ratePerMinute`. Waiters are served in FIFO order.
+ */
+export class TokenBucket {
+  private tokens: number
+  private updatedAt = Date.now()
+  private waiters: Array<{ resolve: () => void, reject: (reason: unknown) => void }> = []
+  private timer: ReturnType<typeof setTimeout> | null = null
+
+  constructor(
+    private readonly ratePerMinute: number,
+    private readonly capacity: number
+  ) {
+    this.tokens = capacity
+  }
+
+  private refill(): void {
+    const now = Date.now()
+    this.tokens = Math.min(this.capacity, this.tokens + (now - this.updatedAt) * this.ratePerMinute / 60_000)
+    this.updatedAt = now
+  }
+
+  /**
+   * Take one token, waiting for a refill if the bucket is empty.
+   * Rejects with the signal's reason if aborted while waiting.
+   */
+  take(signal?: AbortSignal): Promise<void> {
+    if (signal?.aborted)
+      return Promise.reject(signal.reason)
+
+    this.refill()
+    if (!this.waiters.length && this.tokens >= 1) {
+      this.tokens -= 1
+      return Promise.resolve()
+    }
+
+    return new Promise((resolve, reject) => {
+      const waiter = { resolve, reject }
+      this.waiters.push(waiter)
+      signal?.addEventListener('abort', () => {
+        const i = this.waiters.indexOf(waiter)
+        if (i >= 0) {
+          this.waiters.splice(i, 1)
+          reject(signal.reason)
+        }
+      }, { once: true })
+      this.schedule()
+    })
+  }
+
+  /** Callers currently waiting for a token */
+  get waiting(): number {
+    return this.waiters.length
+  }
+
+  private schedule(): void {
+    if (this.timer || !this.waiters.length)
+      return
+    const waitMs = Math.max(0, (1 - this.tokens) * 60_000 / this.ratePerMinute)
+    this.timer = setTimeout(() => {
+      this.timer = null
+      this.refill()
+      while (this.waiters.length && this.tokens >= 1) {
+        this.tokens -= 1
+        this.waiters.shift()!.resolve()
+      }
+      this.schedule()
+    }, waitMs)
+    this.timer.unref()
+  }
+}
@@ -19,6 +19,16 @@ export interface AgentManifest {
 export interface AgentKnowledge {
   files: KnowledgeFile[]
   text: string
+  search: (query: string, k?: number) => KnowledgeSearchResult[]
+}
+
+// A scored chunk returned by context.knowledge.search()
+export interface KnowledgeSearchResult {
+  path: string
+  heading?: string
+  text: string
+  score: number
+  tokens: number
 }
 
 export interface KnowledgeFile {
@@ -8,7 +8,7 @@ import type {
   memoryChunks,
   cronAgents, cronAgentRuns,
   sharedDocuments,
-  secrets, tokenUsage, appSettings
+  secrets, tokenUsage, tokenUsageDaily, appSettings
 } from '~~/server/db/schema'
 
 // Auth
@@ -54,6 +54,7 @@ export type SharedDocument = InferSelectModel<typeof sharedDocuments>
 // System
 export type Secret = InferSelectModel<typeof secrets>
 export type TokenUsageRecord = InferSelectModel<typeof tokenUsage>
+export type TokenUsageDailyRecord = InferSelectModel<typeof tokenUsageDaily>
 export type AppSetting = InferSelectModel<typeof appSettings>
 
 // Enums
@@ -114,8 +115,21 @@ export interface UsageStats {
   totalCost: number
   totalInputTokens: number
   totalOutputTokens: number
+  totalCacheReadTokens: number
+  totalCacheWriteTokens: number
   totalCalls: number
   dailyBreakdown: DailyUsage[]
+  byModel: UsageBreakdown[]
+  byProvider: UsageBreakdown[]
+  bySource: UsageBreakdown[]
+}
+
+export interface UsageBreakdown {
+  key: string
+  cost: number
+  inputTokens: number
+  outputTokens: number
+  calls: number
 }
 
 export interface DailyUsage {
@@ -133,6 +147,12 @@ export interface MessageMetadata {
   outputTokens?: number
   durationMs?: number
   createdAt?: string
+  // Retrieval mode: tokens of injected knowledge vs. savings over full-text mode
+  knowledgeTokens?: number
+  knowledgeTokensSaved?: number
+  // Input tokens served from / written to the provider's prompt cache
+  cacheReadTokens?: number
+  cacheWriteTokens?: number
 }
 
 // API response wrapper